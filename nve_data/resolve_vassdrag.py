@@ -11,19 +11,191 @@ Eksempel:
         print(f"{match['score']}: {match['matched_navn']} ({match['vassdragsnr']})")
 """
 
+import heapq
 import json
+import mmap
+import os
+import pickle
 import re
+import sys
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson er valgfri - json.loads gir samme resultat, bare tregere
+    _json_loads = json.loads
+
+try:
+    from rapidfuzz import process as _rapidfuzz_process
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+except ImportError:  # rapidfuzz er valgfri - da brukes ren Python (bit-parallell Myers)
+    _rapidfuzz_process = None
+    _rapidfuzz_levenshtein = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy er valgfri (trengs av numba og rapidfuzz.process.cdist)
+    np = None
+
+if _rapidfuzz_levenshtein is None:
+    try:
+        import numba
+    except ImportError:  # numba er valgfri - brukes bare for fuzzy-søk når rapidfuzz mangler
+        numba = None
+else:
+    # Med rapidfuzz brukes aldri numba-kjernen; importen og lasting av den
+    # kompilerte kjernen ville ellers kostet flere tidels sekunder ved hver oppstart
+    numba = None
 
 
 # Standard stier (kan overstyres)
 DEFAULT_ENDING_MAP_PATH = Path(__file__).parent / "ending_map.json"
 DEFAULT_REGINE_INDEX_PATH = Path(__file__).parent / "INDEX_regine.json"
 
+
+
+class RegineColumns(NamedTuple):
+    """
+    Regine-indeksen lagret kolonnevis (struct-of-arrays).
+
+    Alle lister er parallelle med 'entries', slik at søkeløkkene kan jobbe på
+    ferdig normaliserte strenger uten dict-oppslag og .lower() per iterasjon.
+    Fonetiske felt er None når det tilhørende navnefeltet er tomt.
+    'exact_index' slår opp lowercase navn → indeks (treff på 'navn' går foran
+    'navn_normalisert', og første forekomst vinner).
+    'prefix_sorted' er alle ikke-tomme lowercase navn (begge felt) sortert, med
+    'prefix_positions' parallelt (feltnummer * antall + indeks), for prefikssøk med bisect.
+    """
+    entries: list[dict]
+    navn: list[str]
+    navn_lower: list[str]
+    navn_normalisert: list[str]
+    navn_normalisert_lower: list[str]
+    phonetic_navn: list[Optional[str]]
+    phonetic_navn_normalisert: list[Optional[str]]
+    vassdragsnr: list[str]
+    exact_index: dict[str, int]
+    prefix_sorted: list[str]
+    prefix_positions: list[int]
+
+
+class Match(NamedTuple):
+    """
+    Et treff fra resolve_vassdrag_single. Lagres som tuple i cachen og gjøres
+    om til dict (se as_dict) først når det returneres fra det offentlige API-et.
+    """
+    original_input: str
+    matched_navn: str
+    matched_variant: str
+    vassdragsnr: str
+    lat: float
+    long: float
+    score: int
+    match_type: str
+    vassdragsnr_bonus: int = 0
+    prefix_bonus: Optional[int] = None  # None for eksakte treff (har ingen prefix-bonus)
+
+    def as_dict(self) -> dict:
+        """Samme dict som før (uten 'prefix_bonus' for eksakte treff)."""
+        match = self._asdict()
+        if self.prefix_bonus is None:
+            del match["prefix_bonus"]
+        return match
+
+
+@dataclass(frozen=True)
+class NormalizedQuery:
+    """
+    Et søkenavn med de normaliserte formene søkefunksjonene trenger, beregnet
+    én gang og sendt nedover i kallkjeden i stedet for å normalisere på nytt
+    i hver funksjon.
+    """
+    original: str
+    lower: str
+    phonetic: str
+
+    @classmethod
+    def from_text(cls, text: str) -> "NormalizedQuery":
+        return cls(original=text, lower=text.lower(), phonetic=phonetic_normalize(text))
+
+
+def _as_query(search_name: Union[str, NormalizedQuery]) -> NormalizedQuery:
+    """Godtar både en vanlig streng og et ferdig normalisert søkenavn."""
+    if isinstance(search_name, NormalizedQuery):
+        return search_name
+    return NormalizedQuery.from_text(search_name)
+
+
 # Cache for å unngå å laste filene flere ganger
 _ENDING_MAP_CACHE: Optional[dict[str, str]] = None
-_REGINE_INDEX_CACHE: Optional[list[dict]] = None
+# Kompilert endings-regex for ending_map den ble bygget fra (ending_map, regex)
+_ENDINGS_RE_CACHE: Optional[tuple[dict[str, str], re.Pattern]] = None
+_REGINE_COLUMNS_CACHE: Optional[RegineColumns] = None
+# Kolonner bygget fra en liste som ble sendt inn direkte (listen, kolonnene)
+_LIST_COLUMNS_CACHE: Optional[tuple[list[dict], RegineColumns]] = None
+# BK-tre over fonetiske former for kolonnene det ble bygget fra (kolonner, tre)
+_BKTREE_CACHE: Optional[tuple[RegineColumns, "BKTree"]] = None
+# Delete-indeks (SymSpell) over fonetiske former for kolonnene (kolonner, indeks).
+# Bygges bare av resolve_vassdrag_batch, se DeleteIndex
+_DELETE_INDEX_CACHE: Optional[tuple[RegineColumns, "DeleteIndex"]] = None
+# Delt trådpool for resolve_composite_vassdrag (se _composite_executor)
+_COMPOSITE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+# Fonetiske former pakket for numba-skanning (kolonner, (koder, offsets))
+_PACKED_PHONETIC_CACHE: Optional[tuple[RegineColumns, tuple]] = None
+# Fuzzy-kandidater forhåndsberegnet av resolve_vassdrag_batch
+# (kolonner, {(fonetisk søkenavn, max_distance): kandidater})
+_FUZZY_PREFILL: Optional[tuple[RegineColumns, dict]] = None
+# Antall søkenavn per cdist-kall (begrenser størrelsen på avstandsmatrisen)
+_CDIST_BLOCK_SIZE = 256
+# Minste antall unike navn før resolve_vassdrag_batch bygger delete-indeksen
+# (byggingen tar rundt et sekund; med rapidfuzz eller numba er hvert fuzzy-søk
+# allerede billig, så da må batchen være mye større før det lønner seg)
+_DELETE_INDEX_MIN_BATCH = 200
+_DELETE_INDEX_MIN_BATCH_FAST = 2000
+
+# Versjon av formatet i INDEX_regine.cache.pkl (øk ved endringer i innholdet)
+_PICKLE_CACHE_VERSION = 5
+
+# Suffix-tabeller for iter_variants (bygges én gang, ikke per kall)
+_VASSDRAG_SUFFIX_CHECK = (
+    "vassdraget", "vassdragene", "vassdrag", "vasdrag", "elv", "elva",
+    "vann", "vatn", "sjø", "tjern", "bekk", "å",
+)
+_NORMALIZED_CATEGORIES = ("ELV_SAMISK", "VANN_SAMISK", "ELV", "VANN", "DAL", "FJORD", "FJELL")
+_STEM_SUFFIXES = ("vassdragene", "vassdraget", "vassdrag", "vasdrag", "reguleringen")
+# Primære suffixes: mest relevante for vassdrag
+_PRIMARY_SUFFIXES = ("ELV", "VANN", "vassdraget")
+# Sekundære suffixes: mindre sannsynlige for vassdrag
+_SECONDARY_SUFFIXES = ("FJORD", "DAL", "FJELL")
+_FOSS_SUFFIXES = ("fossen", "foss", "faldene", "fallet", "fall", "fossan", "fosane")
+_FOSS_PRIMARY_SUFFIXES = ("vassdraget", "ELV", "VANN")
+_FOSS_SECONDARY_SUFFIXES = ("DAL", "FJORD")
+_DIRECTIONAL_PREFIXES = frozenset({
+    "nordre", "søndre", "østre", "vestre", "øvre", "nedre", "gamle", "nørdre",
+})
+
+# Bonus for vassdragsnr-lengde, indeksert med min(len(vassdragsnr), 8)
+_VNR_BONUS = (10, 10, 10, 10, 8, 6, 4, 2, 0)
+
+_score_key = itemgetter("score")
+
+# match_type for startswith-treff per felt
+_STARTSWITH_MATCH_TYPES = {field: f"startswith_{field}" for field in ("navn", "navn_normalisert")}
+
+# Sammensatte navn: " og " (uansett store/små bokstaver) eller bindestrek
+_COMPOSITE_DETECT = re.compile(r" og |-", re.IGNORECASE)
+_OG_DETECT = re.compile(r" og ", re.IGNORECASE)
+_OG_SPLIT = re.compile(r"\s+og\s+", re.IGNORECASE)
+# Deler av bindestrek-navn som bare er suffix og ikke egne vassdrag
+_COMPOSITE_SUFFIXES = frozenset({"vassdragene", "vassdraget", "vassdrag", "kraftverk", "verk"})
 
 
 def load_ending_map(path: Path = DEFAULT_ENDING_MAP_PATH) -> dict[str, str]:
@@ -32,20 +204,161 @@ def load_ending_map(path: Path = DEFAULT_ENDING_MAP_PATH) -> dict[str, str]:
     if _ENDING_MAP_CACHE is None:
         if not path.exists():
             raise FileNotFoundError(f"Fant ikke {path}")
-        with path.open(encoding="utf-8") as f:
-            _ENDING_MAP_CACHE = json.load(f)
+        _ENDING_MAP_CACHE = _json_loads(path.read_bytes())
     return _ENDING_MAP_CACHE
 
 
-def load_regine_index(path: Path = DEFAULT_REGINE_INDEX_PATH) -> list[dict]:
-    """Laster INDEX_regine.json."""
-    global _REGINE_INDEX_CACHE
-    if _REGINE_INDEX_CACHE is None:
+def _pickle_cache_path(path: Path) -> Path:
+    """Sti til pickle-cachen som ligger ved siden av JSON-filen."""
+    return path.with_name(path.stem + ".cache.pkl")
+
+
+def _pickle_cache_key(path: Path) -> tuple[int, int, int]:
+    """Cachen er gyldig så lenge kildefilen har samme mtime og størrelse."""
+    stat = path.stat()
+    return (_PICKLE_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+
+def _read_pickle_cache(path: Path):
+    """
+    Leser data fra pickle-cachen, eller None hvis den mangler eller er utdatert.
+
+    Filen mappes inn med mmap og nøkkelen leses først, så en utdatert cache
+    forkastes uten at selve indeksen pakkes ut.
+    """
+    cache_path = _pickle_cache_path(path)
+    if not cache_path.exists():
+        return None
+    try:
+        with cache_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # To separate load-kall: hver pickle har sin egen memo-tabell
+            if pickle.load(buffer) != _pickle_cache_key(path):
+                return None
+            return pickle.load(buffer)
+    except Exception:
+        # Korrupt eller ukjent cache - bygg på nytt fra JSON
+        return None
+
+
+def _write_pickle_cache(path: Path, data) -> None:
+    """Skriver data til pickle-cachen. Feil ignoreres (f.eks. skrivebeskyttet mappe)."""
+    cache_path = _pickle_cache_path(path)
+    # PID i navnet: to prosesser som bygger cachen samtidig skriver til hver sin fil
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            pickle.dump(_pickle_cache_key(path), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(cache_path)
+    except OSError:
+        pass
+
+
+def load_regine_columns(path: Path = DEFAULT_REGINE_INDEX_PATH) -> RegineColumns:
+    """
+    Laster INDEX_regine.json som kolonner (se RegineColumns).
+
+    Første gang parses JSON-filen (med orjson hvis installert), kolonnene og
+    BK-treet for fuzzy-søk bygges, og resultatet lagres i INDEX_regine.cache.pkl.
+    Senere prosesser leser pickle-filen direkte så lenge JSON-filen ikke er endret.
+    """
+    global _REGINE_COLUMNS_CACHE, _BKTREE_CACHE
+    if _REGINE_COLUMNS_CACHE is None:
         if not path.exists():
             raise FileNotFoundError(f"Fant ikke {path}")
-        with path.open(encoding="utf-8") as f:
-            _REGINE_INDEX_CACHE = json.load(f)
-    return _REGINE_INDEX_CACHE
+        cached = _read_pickle_cache(path)
+        if cached is not None:
+            column_values, tree_root, tree_size = cached
+            columns = RegineColumns(*column_values)
+            tree = BKTree(tree_root, tree_size)
+        else:
+            columns = build_regine_columns(_json_loads(path.read_bytes()))
+            tree = build_phonetic_bktree(columns)
+            # Lagres som vanlige tupler/lister så cachen ikke avhenger av modulnavnet
+            _write_pickle_cache(path, (tuple(columns), tree.root, tree.size))
+        _REGINE_COLUMNS_CACHE = columns
+        _BKTREE_CACHE = (columns, tree)
+    return _REGINE_COLUMNS_CACHE
+
+
+def load_regine_index(path: Path = DEFAULT_REGINE_INDEX_PATH) -> list[dict]:
+    """Laster INDEX_regine.json som en liste av dicts."""
+    return load_regine_columns(path).entries
+
+
+def build_regine_columns(regine_index: list[dict]) -> RegineColumns:
+    """Bygger kolonnevise lister (inkl. lowercase og fonetiske former) fra indeksen."""
+    navn = []
+    navn_normalisert = []
+    phonetic_navn = []
+    phonetic_navn_normalisert = []
+    vassdragsnr = []
+
+    for entry in regine_index:
+        value = entry.get("navn") or ""
+        navn.append(value)
+        phonetic_navn.append(phonetic_normalize(value) if value else None)
+
+        value = entry.get("navn_normalisert") or ""
+        navn_normalisert.append(value)
+        phonetic_navn_normalisert.append(phonetic_normalize(value) if value else None)
+
+        vassdragsnr.append(entry.get("vassdragsnr"))
+
+    navn_lower = [value.lower() for value in navn]
+    navn_normalisert_lower = [value.lower() for value in navn_normalisert]
+
+    # 'navn' fylles inn først, så 'navn_normalisert' bare der navnet ikke finnes
+    exact_index = {}
+    for lowered in (navn_lower, navn_normalisert_lower):
+        for idx, value in enumerate(lowered):
+            exact_index.setdefault(value, idx)
+
+    # Sortert liste over begge feltene for prefikssøk (se find_startswith_matches)
+    count = len(regine_index)
+    prefix_pairs = sorted(
+        (lowered[idx], field_no * count + idx)
+        for field_no, (values, lowered) in enumerate(((navn, navn_lower), (navn_normalisert, navn_normalisert_lower)))
+        for idx in range(count)
+        if values[idx]
+    )
+
+    return RegineColumns(
+        entries=regine_index,
+        navn=navn,
+        navn_lower=navn_lower,
+        navn_normalisert=navn_normalisert,
+        navn_normalisert_lower=navn_normalisert_lower,
+        phonetic_navn=phonetic_navn,
+        phonetic_navn_normalisert=phonetic_navn_normalisert,
+        vassdragsnr=vassdragsnr,
+        exact_index=exact_index,
+        prefix_sorted=[value for value, _ in prefix_pairs],
+        prefix_positions=[position for _, position in prefix_pairs],
+    )
+
+
+def _as_columns(regine_index: Union[RegineColumns, list[dict]]) -> RegineColumns:
+    """Godtar både kolonner og en vanlig liste av dicts (kolonnene caches per liste)."""
+    global _LIST_COLUMNS_CACHE
+    if isinstance(regine_index, RegineColumns):
+        return regine_index
+    if _LIST_COLUMNS_CACHE is None or _LIST_COLUMNS_CACHE[0] is not regine_index:
+        _LIST_COLUMNS_CACHE = (regine_index, build_regine_columns(regine_index))
+    return _LIST_COLUMNS_CACHE[1]
+
+
+def _endings_regex(ending_map: dict[str, str]) -> re.Pattern:
+    """
+    Kompilert regex som finner lengste ending fra ending_map på slutten av et
+    (lowercase) ord, med minst ett tegn igjen som stamme. Bygges én gang per
+    ending_map i stedet for å sortere og sjekke alle endingene per ord.
+    """
+    global _ENDINGS_RE_CACHE
+    if _ENDINGS_RE_CACHE is None or _ENDINGS_RE_CACHE[0] is not ending_map:
+        alternatives = "|".join(map(re.escape, sorted(ending_map, key=len, reverse=True)))
+        _ENDINGS_RE_CACHE = (ending_map, re.compile(f"(.+?)({alternatives})$", re.DOTALL))
+    return _ENDINGS_RE_CACHE[1]
 
 
 def normalize_vassdrag_navn(text: str, ending_map: dict[str, str]) -> str:
@@ -57,47 +370,39 @@ def normalize_vassdrag_navn(text: str, ending_map: dict[str, str]) -> str:
     if not stripped:
         return ""
 
-    words = stripped.split()
-    endings_sorted = sorted(ending_map.keys(), key=len, reverse=True)
+    endings_re = _endings_regex(ending_map)
     normalized_words = []
 
-    for word in words:
-        lower_word = word.lower()
-        replaced = False
-
-        # Prøv å matche lengste ending først
-        for ending in endings_sorted:
-            if lower_word.endswith(ending) and len(lower_word) > len(ending):
-                # Behold den originale casen for stammen, legg til kategorien
-                cut = len(word) - len(ending)
-                word = word[:cut] + ending_map[ending]
-                replaced = True
-                break
+    for word in stripped.split():
+        # Lengste ending som gir en ikke-tom stamme (lat stamme = lengste ending)
+        match = endings_re.match(word.lower())
+        if match:
+            # Behold den originale casen for stammen, legg til kategorien
+            ending = match.group(2)
+            cut = len(word) - len(ending)
+            word = word[:cut] + ending_map[ending]
 
         normalized_words.append(word)
 
     return " ".join(normalized_words)
 
 
-def find_exact_match(search_name: str, regine_index: list[dict]) -> Optional[dict]:
+def find_exact_match(
+    search_name: str,
+    regine_index: Union[RegineColumns, list[dict]]
+) -> Optional[dict]:
     """
     Søker etter eksakt match i INDEX_regine.json basert på 'navn' eller 'navn_normalisert' (case-insensitive).
     Prioriterer match på 'navn' feltet først, deretter 'navn_normalisert'.
     Returnerer første match hvis funnet, ellers None.
     """
-    search_lower = search_name.lower()
-
-    # Første pass: søk etter match på 'navn' feltet (originalnavn i indeksen)
-    for entry in regine_index:
-        if entry.get("navn", "").lower() == search_lower:
-            return entry
-
-    # Andre pass: søk etter match på 'navn_normalisert' feltet
-    for entry in regine_index:
-        if entry.get("navn_normalisert", "").lower() == search_lower:
-            return entry
+    columns = _as_columns(regine_index)
 
-    return None
+    # Ett dict-oppslag i stedet for å lete gjennom begge kolonnene
+    idx = columns.exact_index.get(search_name.lower())
+    if idx is None:
+        return None
+    return columns.entries[idx]
 
 
 def phonetic_normalize(text: str) -> str:
@@ -166,30 +471,420 @@ def levenshtein_distance(s1: str, s2: str) -> int:
     """
     Beregner Levenshtein distance (edit distance) mellom to strenger.
     Returnerer antall enkeltkarakters endringer (insert, delete, replace) som trengs.
+
+    Bruker rapidfuzz hvis installert. Ellers brukes Myers/Hyyrös bit-parallelle
+    algoritme, der en hel DP-kolonne ligger i ett heltall (én bit per tegn i
+    den korteste strengen), så hvert tegn i den lengste koster en håndfull
+    bitoperasjoner i stedet for en indre løkke.
     """
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.distance(s1, s2)
+
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+        s1, s2 = s2, s1
 
     if len(s2) == 0:
         return len(s1)
 
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
+    # Bitmaske per tegn: hvilke posisjoner i s2 tegnet forekommer på
+    peq = {}
+    bit = 1
+    for c in s2:
+        peq[c] = peq.get(c, 0) | bit
+        bit <<= 1
+    mask = bit - 1
+    last = bit >> 1
+    get = peq.get
+
+    # Positive/negative vertikale differanser i gjeldende kolonne
+    pv = mask
+    mv = 0
+    distance = len(s2)
+    for c in s1:
+        eq = get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = (ph << 1) | 1
+        pv = ((mh << 1) | ~(xv | ph)) & mask
+        mv = ph & xv
+
+    return distance
+
+
+def levenshtein_distance_bounded(s1: str, s2: str, k: int) -> int:
+    """
+    Beregner Levenshtein distance, men bare innenfor et bånd på k rundt diagonalen (Ukkonen).
+    Returnerer k + 1 så snart det er klart at avstanden er større enn k.
+
+    Gir samme svar som levenshtein_distance() når avstanden er <= k, men fyller
+    bare O((2k+1)·n) celler og avbryter tidlig når en hel rad overstiger k.
+    Med rapidfuzz installert brukes dens score_cutoff, som har samme semantikk.
+    """
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.distance(s1, s2, score_cutoff=k)
+
+    # Med bredt bånd er den bit-parallelle varianten raskere enn å fylle båndet
+    if k > 2:
+        return min(levenshtein_distance(s1, s2), k + 1)
+
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    len1 = len(s1)
+    len2 = len(s2)
+    limit = k + 1
+
+    # Lengdeforskjellen alene gir en nedre grense for avstanden
+    if len1 - len2 > k:
+        return limit
+
+    if len2 == 0:
+        return len1
+
+    # Celler utenfor båndet regnes som "for dyre" (k + 1)
+    previous_row = [j if j <= k else limit for j in range(len2 + 1)]
+    for i in range(1, len1 + 1):
+        c1 = s1[i - 1]
+        current_row = [limit] * (len2 + 1)
+        if i <= k:
+            current_row[0] = i
+        row_min = current_row[0]
+
+        for j in range(max(1, i - k), min(len2, i + k) + 1):
             # Cost of insertions, deletions, or substitutions
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
+            value = previous_row[j - 1] + (c1 != s2[j - 1])
+            insertions = current_row[j - 1] + 1
+            deletions = previous_row[j] + 1
+            if insertions < value:
+                value = insertions
+            if deletions < value:
+                value = deletions
+            if value > limit:
+                value = limit
+            current_row[j] = value
+            if value < row_min:
+                row_min = value
+
+        # Hele raden er over grensen - avstanden kan bare bli større
+        if row_min > k:
+            return limit
         previous_row = current_row
 
-    return previous_row[-1]
+    return previous_row[len2]
+
+
+# Rekkefølgen feltene sjekkes i (brukes for stabil sortering av fuzzy-treff)
+_FUZZY_FIELDS = ("navn", "navn_normalisert")
+
+
+class BKTree:
+    """
+    Burkhard-Keller-tre over strenger, med Levenshtein distance som metrikk.
+
+    Hver node har en streng, en liste med payloads og barn nøklet på avstanden
+    til noden. Ved søk med maks avstand e trengs bare barn med nøkkel i
+    [d - e, d + e] (trekantulikheten), så de fleste strengene hoppes over.
+    """
+
+    __slots__ = ("root", "size")
+
+    def __init__(self, root: Optional[list] = None, size: int = 0) -> None:
+        # Node: [streng, payloads, {avstand: barn}]
+        self.root = root
+        self.size = size
+
+    def add(self, word: str, payload) -> None:
+        """Legger til payload for strengen (samme streng deler node)."""
+        if self.root is None:
+            self.root = [word, [payload], {}]
+            self.size = 1
+            return
+
+        node = self.root
+        while True:
+            if word == node[0]:
+                node[1].append(payload)
+                return
+            distance = levenshtein_distance(word, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [word, [payload], {}]
+                self.size += 1
+                return
+            node = child
+
+    def find(self, word: str, max_distance: int) -> list[tuple[int, object]]:
+        """Returnerer (avstand, payload) for alle strenger innenfor max_distance."""
+        results = []
+        if self.root is None:
+            return results
+
+        stack = [self.root]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            node_word, payloads, children = pop()
+            # Avstanden trengs bare eksakt opp til største barnenøkkel + max_distance;
+            # er den større, kan verken noden eller noen av barna matche
+            bound = max(children) + max_distance if children else max_distance
+            distance = levenshtein_distance_bounded(word, node_word, bound)
+            if distance <= max_distance:
+                for payload in payloads:
+                    results.append((distance, payload))
+            if distance > bound:
+                continue
+            for child_distance in range(distance - max_distance, distance + max_distance + 1):
+                child = children.get(child_distance)
+                if child is not None:
+                    push(child)
+
+        return results
+
+
+def build_phonetic_bktree(columns: RegineColumns) -> BKTree:
+    """Bygger et BK-tre over de fonetiske formene; payload er (indeks, feltnummer)."""
+    tree = BKTree()
+    phonetic_columns = zip(columns.phonetic_navn, columns.phonetic_navn_normalisert)
+    for idx, phonetic_values in enumerate(phonetic_columns):
+        for field_no, entry_phonetic in enumerate(phonetic_values):
+            if entry_phonetic is not None:
+                tree.add(entry_phonetic, (idx, field_no))
+    return tree
+
+
+def _phonetic_bktree(columns: RegineColumns) -> BKTree:
+    """BK-treet for kolonnene (bygges første gang og caches per kolonneobjekt)."""
+    global _BKTREE_CACHE
+    if _BKTREE_CACHE is None or _BKTREE_CACHE[0] is not columns:
+        _BKTREE_CACHE = (columns, build_phonetic_bktree(columns))
+    return _BKTREE_CACHE[1]
+
+
+class DeleteIndex(NamedTuple):
+    """
+    SymSpell-indeks ("symmetric delete") over fonetiske former.
+
+    Hvis to strenger har edit distance <= d, finnes det en streng begge kan
+    nås fra ved å slette høyst d tegn. Ved å slå opp alle slette-varianter av
+    søkeordet finner vi derfor alle kandidater med noen få dict-oppslag, og
+    trenger bare å regne eksakt avstand for dem.
+
+    Oppslagene er raskere enn BK-treet, men indeksen tar et sekund eller to å
+    bygge og er for stor til å lønne seg i pickle-cachen. Den bygges derfor bare
+    for store batcher (se resolve_vassdrag_batch) og brukes når den finnes.
+    """
+    max_distance: int
+    words: list[str]
+    payloads: list[list[tuple[int, int]]]  # (indeks, feltnummer) per ord
+    deletes: dict[str, Union[int, tuple[int, ...]]]  # slette-variant → ordnummer/-numre
+
+
+def _deletes(word: str, max_distance: int) -> set[str]:
+    """Alle strenger som fås ved å slette høyst max_distance tegn (inkl. ordet selv)."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        result |= frontier
+    return result
+
+
+def build_phonetic_delete_index(columns: RegineColumns, max_distance: int = 2) -> DeleteIndex:
+    """Bygger delete-indeksen over de fonetiske formene; payload er (indeks, feltnummer)."""
+    word_numbers = {}
+    words = []
+    payloads = []
+    phonetic_columns = zip(columns.phonetic_navn, columns.phonetic_navn_normalisert)
+    for idx, phonetic_values in enumerate(phonetic_columns):
+        for field_no, entry_phonetic in enumerate(phonetic_values):
+            if entry_phonetic is None:
+                continue
+            word_no = word_numbers.get(entry_phonetic)
+            if word_no is None:
+                word_no = word_numbers[entry_phonetic] = len(words)
+                words.append(entry_phonetic)
+                payloads.append([])
+            payloads[word_no].append((idx, field_no))
+
+    deletes = {}
+    for word_no, word in enumerate(words):
+        for variant in _deletes(word, max_distance):
+            deletes.setdefault(variant, []).append(word_no)
+
+    # De aller fleste slette-varianter hører til ett ord - lagre det som et tall
+    for variant, word_numbers in deletes.items():
+        deletes[variant] = word_numbers[0] if len(word_numbers) == 1 else tuple(word_numbers)
+
+    return DeleteIndex(max_distance, words, payloads, deletes)
+
+
+def _phonetic_delete_index(columns: RegineColumns) -> DeleteIndex:
+    """Delete-indeksen for kolonnene (bygges første gang og caches per kolonneobjekt)."""
+    global _DELETE_INDEX_CACHE
+    if _DELETE_INDEX_CACHE is None or _DELETE_INDEX_CACHE[0] is not columns:
+        _DELETE_INDEX_CACHE = (columns, build_phonetic_delete_index(columns))
+    return _DELETE_INDEX_CACHE[1]
+
+
+def _fuzzy_candidates_delete_index(index: DeleteIndex, search_phonetic: str, max_distance: int) -> list[tuple[int, int, int]]:
+    """(avstand, indeks, feltnummer) for alle fonetiske former innenfor max_distance."""
+    deletes = index.deletes
+    word_numbers = set()
+    for variant in _deletes(search_phonetic, max_distance):
+        found = deletes.get(variant)
+        if found is None:
+            continue
+        if isinstance(found, int):
+            word_numbers.add(found)
+        else:
+            word_numbers.update(found)
+
+    candidates = []
+    words = index.words
+    for word_no in word_numbers:
+        distance = levenshtein_distance_bounded(search_phonetic, words[word_no], max_distance)
+        if distance <= max_distance:
+            candidates.extend((distance, idx, field_no) for idx, field_no in index.payloads[word_no])
+    return candidates
+
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True)
+    def _bounded_distances_jit(codes, offsets, query, k):
+        """
+        Båndbegrenset Levenshtein (som levenshtein_distance_bounded) fra query til
+        hver pakket streng codes[offsets[i]:offsets[i + 1]]. Returnerer k + 1 for
+        strenger som er lenger unna enn k.
+        """
+        count = offsets.shape[0] - 1
+        len2 = query.shape[0]
+        limit = k + 1
+        distances = np.full(count, limit, np.int64)
+        previous_row = np.empty(len2 + 1, np.int64)
+        current_row = np.empty(len2 + 1, np.int64)
+
+        for idx in range(count):
+            start = offsets[idx]
+            len1 = offsets[idx + 1] - start
+            if abs(len1 - len2) > k:
+                continue
+            if len2 == 0:
+                distances[idx] = len1
+                continue
+
+            for j in range(len2 + 1):
+                previous_row[j] = j if j <= k else limit
+            within = True
+            for i in range(1, len1 + 1):
+                c1 = codes[start + i - 1]
+                for j in range(len2 + 1):
+                    current_row[j] = limit
+                if i <= k:
+                    current_row[0] = i
+                row_min = current_row[0]
+                for j in range(max(1, i - k), min(len2, i + k) + 1):
+                    value = previous_row[j - 1] + (1 if c1 != query[j - 1] else 0)
+                    if current_row[j - 1] + 1 < value:
+                        value = current_row[j - 1] + 1
+                    if previous_row[j] + 1 < value:
+                        value = previous_row[j] + 1
+                    if value > limit:
+                        value = limit
+                    current_row[j] = value
+                    if value < row_min:
+                        row_min = value
+                if row_min > k:
+                    within = False
+                    break
+                previous_row, current_row = current_row, previous_row
+            if within:
+                distances[idx] = previous_row[len2]
+
+        return distances
+
+    def _encode_code_points(text: str):
+        """Unicode-kodepunkter som uint32-array (æ/ø/å får egne koder)."""
+        return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    # Kompiler (eller les fra numba-cachen) ved import, ikke ved første søk
+    _bounded_distances_jit(_encode_code_points("ab"), np.array([0, 2], np.int64), _encode_code_points("ab"), 1)
+else:
+    _bounded_distances_jit = None
+
+
+def _packed_phonetic(columns: RegineColumns) -> tuple:
+    """
+    De fonetiske formene (navn, så navn_normalisert) pakket i én kodepunkt-buffer
+    med offsets, slik at numba kan skanne alle i ett kall. Tomme felt pakkes som
+    tomme strenger. Caches per kolonneobjekt.
+    """
+    global _PACKED_PHONETIC_CACHE
+    if _PACKED_PHONETIC_CACHE is None or _PACKED_PHONETIC_CACHE[0] is not columns:
+        values = [value or "" for value in columns.phonetic_navn]
+        values += [value or "" for value in columns.phonetic_navn_normalisert]
+        offsets = np.zeros(len(values) + 1, np.int64)
+        np.cumsum([len(value) for value in values], out=offsets[1:])
+        codes = _encode_code_points("".join(values))
+        _PACKED_PHONETIC_CACHE = (columns, (codes, offsets))
+    return _PACKED_PHONETIC_CACHE[1]
+
+
+def _fuzzy_candidates_numba(columns: RegineColumns, search_phonetic: str, max_distance: int) -> list[tuple[int, int, int]]:
+    """(avstand, indeks, feltnummer) for alle fonetiske former innenfor max_distance."""
+    codes, offsets = _packed_phonetic(columns)
+    distances = _bounded_distances_jit(codes, offsets, _encode_code_points(search_phonetic), max_distance)
+    return _candidates_from_distances(columns, distances, max_distance)
+
+
+def _candidates_from_distances(columns: RegineColumns, distances, max_distance: int) -> list[tuple[int, int, int]]:
+    """
+    Gjør om en avstandsrad (navn-kolonnen etterfulgt av navn_normalisert-kolonnen)
+    til (avstand, indeks, feltnummer) for formene innenfor max_distance.
+    """
+    count = len(columns.phonetic_navn)
+    phonetic_fields = (columns.phonetic_navn, columns.phonetic_navn_normalisert)
+
+    candidates = []
+    for position in np.flatnonzero(distances <= max_distance).tolist():
+        field_no, idx = divmod(position, count)
+        if phonetic_fields[field_no][idx] is not None:
+            candidates.append((int(distances[position]), idx, field_no))
+    return candidates
+
+
+def _prefill_fuzzy_candidates(columns: RegineColumns, search_names: Iterable[str], max_distance: int, min_length: int) -> dict:
+    """
+    Beregner fuzzy-kandidater for mange søkenavn med rapidfuzz.process.cdist
+    (C++, alle kjerner) i stedet for ett søk per navn.
+    Returnerer {(fonetisk søkenavn, max_distance): kandidater} som find_fuzzy_matches bruker.
+    """
+    search_phonetics = list(dict.fromkeys(
+        NormalizedQuery.from_text(name).phonetic for name in search_names if len(name) >= min_length
+    ))
+    choices = [value or "" for value in columns.phonetic_navn]
+    choices += [value or "" for value in columns.phonetic_navn_normalisert]
+
+    prefill = {}
+    for start in range(0, len(search_phonetics), _CDIST_BLOCK_SIZE):
+        block = search_phonetics[start:start + _CDIST_BLOCK_SIZE]
+        matrix = _rapidfuzz_process.cdist(
+            block, choices, scorer=_rapidfuzz_levenshtein.distance,
+            score_cutoff=max_distance, dtype=np.int32, workers=-1,
+        )
+        for search_phonetic, distances in zip(block, matrix):
+            prefill[search_phonetic, max_distance] = _candidates_from_distances(columns, distances, max_distance)
+    return prefill
 
 
 def find_fuzzy_matches(
-    search_name: str,
-    regine_index: list[dict],
+    search_name: Union[str, NormalizedQuery],
+    regine_index: Union[RegineColumns, list[dict]],
     max_distance: int = 2,
     min_length: int = 5
 ) -> list[tuple[dict, int, str]]:
@@ -197,8 +892,8 @@ def find_fuzzy_matches(
     Søker etter fuzzy matches basert på fonetisk normalisering og edit distance.
 
     Args:
-        search_name: Navnet å søke etter
-        regine_index: Regine-indeksen
+        search_name: Navnet å søke etter (streng eller NormalizedQuery)
+        regine_index: Regine-indeksen (kolonner eller liste av dicts)
         max_distance: Maksimal Levenshtein distance (default: 2)
         min_length: Minimum lengde på søkeord for fuzzy matching (default: 5)
 
@@ -207,45 +902,51 @@ def find_fuzzy_matches(
         Sortert etter edit distance (lavest først)
     """
     # Ikke gjør fuzzy matching på veldig korte navn
-    if len(search_name) < min_length:
+    query = _as_query(search_name)
+    if len(query.original) < min_length:
         return []
 
-    search_phonetic = phonetic_normalize(search_name)
-    matches = []
-
-    for entry in regine_index:
-        # Sjekk både 'navn' og 'navn_normalisert' feltet
-        for field in ["navn", "navn_normalisert"]:
-            entry_value = entry.get(field, "")
-            if not entry_value:
-                continue
-
-            entry_phonetic = phonetic_normalize(entry_value)
-
-            # Beregn edit distance
-            distance = levenshtein_distance(search_phonetic, entry_phonetic)
-
-            # Hvis distansen er innenfor grensen, legg til match
-            if distance <= max_distance:
-                matches.append((entry, distance, field))
+    columns = _as_columns(regine_index)
+    search_phonetic = query.phonetic
+
+    prefill = _FUZZY_PREFILL
+    delete_index = _DELETE_INDEX_CACHE[1] if _DELETE_INDEX_CACHE and _DELETE_INDEX_CACHE[0] is columns else None
+    if prefill is not None and prefill[0] is columns and (search_phonetic, max_distance) in prefill[1]:
+        # Forhåndsberegnet av resolve_vassdrag_batch (kopi, listen sorteres under)
+        matches = list(prefill[1][search_phonetic, max_distance])
+    elif delete_index is not None and max_distance <= delete_index.max_distance:
+        # Delete-indeksen (bygget for en stor batch) gir kandidatene med noen få dict-oppslag
+        matches = _fuzzy_candidates_delete_index(delete_index, search_phonetic, max_distance)
+    elif _rapidfuzz_levenshtein is None and _bounded_distances_jit is not None:
+        # Uten rapidfuzz er én numba-skanning over hele indeksen raskere enn
+        # BK-treet, som må kalle avstandsfunksjonen fra Python per node
+        matches = _fuzzy_candidates_numba(columns, search_phonetic, max_distance)
+    else:
+        # BK-treet gir alle fonetiske former innenfor max_distance uten å
+        # beregne edit distance mot hele indeksen
+        matches = [
+            (distance, idx, field_no)
+            for distance, (idx, field_no) in _phonetic_bktree(columns).find(search_phonetic, max_distance)
+        ]
 
-    # Sorter etter edit distance (lavest først) og returner
-    matches.sort(key=lambda x: x[1])
+    # Sorter etter edit distance (lavest først), deretter indeksrekkefølge
+    matches.sort()
 
     # Fjern duplikater (samme vassdragsnr)
     seen = set()
     unique_matches = []
-    for match, distance, field in matches:
-        if match["vassdragsnr"] not in seen:
-            seen.add(match["vassdragsnr"])
-            unique_matches.append((match, distance, field))
+    for distance, idx, field_no in matches:
+        vassdragsnr = columns.vassdragsnr[idx]
+        if vassdragsnr not in seen:
+            seen.add(vassdragsnr)
+            unique_matches.append((columns.entries[idx], distance, _FUZZY_FIELDS[field_no]))
 
     return unique_matches
 
 
 def find_startswith_matches(
-    search_name: str,
-    regine_index: list[dict],
+    search_name: Union[str, NormalizedQuery],
+    regine_index: Union[RegineColumns, list[dict]],
     min_length: int = 3
 ) -> list[tuple[dict, str]]:
     """
@@ -253,37 +954,50 @@ def find_startswith_matches(
     F.eks. "suldal" matcher "suldalsvassdraget" eller vice versa.
 
     Args:
-        search_name: Navnet å søke etter
-        regine_index: Regine-indeksen
+        search_name: Navnet å søke etter (streng eller NormalizedQuery)
+        regine_index: Regine-indeksen (kolonner eller liste av dicts)
         min_length: Minimum lengde for startswith matching (default: 3)
 
     Returns:
         Liste med tuples: (match_entry, matched_field)
     """
     # Ikke gjør startswith matching på veldig korte navn
-    if len(search_name) < min_length:
+    query = _as_query(search_name)
+    if len(query.original) < min_length:
         return []
 
-    search_lower = search_name.lower()
+    columns = _as_columns(regine_index)
+    search_lower = query.lower
+    keys = columns.prefix_sorted
+    positions = columns.prefix_positions
+
+    # Navn som starter med søkenavnet ligger samlet i den sorterte listen:
+    # fra søkenavnet og opp til (ikke med) søkenavnet med siste tegn økt med én
+    upper = search_lower[:-1] + chr(ord(search_lower[-1]) + 1)
+    hits = set(positions[bisect_left(keys, search_lower):bisect_left(keys, upper)])
+
+    # Navn som søkenavnet starter med: slå opp hvert prefiks av søkenavnet
+    for end in range(1, len(search_lower)):
+        prefix = search_lower[:end]
+        start = bisect_left(keys, prefix)
+        stop = bisect_right(keys, prefix, start)
+        hits.update(positions[start:stop])
+
+    # Samme rekkefølge som en gjennomgang av indeksen ('navn' før 'navn_normalisert')
+    count = len(columns.entries)
+    field_columns = (("navn", columns.navn), ("navn_normalisert", columns.navn_normalisert))
     matches = []
     seen = set()
+    for idx, field_no in sorted(divmod(position, count)[::-1] for position in hits):
+        field, values = field_columns[field_no]
+        if len(values[idx]) < min_length:
+            continue
 
-    for entry in regine_index:
-        # Sjekk både 'navn' og 'navn_normalisert' feltet
-        for field in ["navn", "navn_normalisert"]:
-            entry_value = entry.get(field, "")
-            if not entry_value or len(entry_value) < min_length:
-                continue
-
-            entry_lower = entry_value.lower()
-
-            # Sjekk om ett starter med det andre
-            if entry_lower.startswith(search_lower) or search_lower.startswith(entry_lower):
-                # Unngå duplikater basert på vassdragsnr + field
-                key = (entry["vassdragsnr"], field)
-                if key not in seen:
-                    seen.add(key)
-                    matches.append((entry, field))
+        # Unngå duplikater basert på vassdragsnr + field
+        key = (columns.vassdragsnr[idx], field)
+        if key not in seen:
+            seen.add(key)
+            matches.append((columns.entries[idx], field))
 
     return matches
 
@@ -293,7 +1007,22 @@ def generate_variants(original_name: str, ending_map: dict[str, str]) -> list[tu
     Genererer alle mulige varianter av et vassdragsnavn med scoringer.
 
     Returnerer liste med tuples: (variant, score, beskrivelse)
-    Høyere score = bedre match.
+    Høyere score = bedre match. Se iter_variants for score-systemet.
+    """
+    return list(iter_variants(original_name, ending_map))
+
+
+def iter_variants(original_name: str, ending_map: dict[str, str]) -> Iterator[tuple[str, int, str]]:
+    """
+    Genererer varianter av et vassdragsnavn lazy.
+
+    Yielder tuples: (variant, score, beskrivelse)
+    Høyere score = bedre match. Rekkefølgen er genereringsrekkefølgen (ikke
+    sortert på score); den avgjør hvilken variant som beholdes når flere
+    treffer samme vassdragsnr.
+
+    Originalnavnet og "+vassdraget/ELV/VANN" (score 100-97) yieldes før
+    resten beregnes.
 
     Score-system (grunnpoeng + bonuspoeng/penalty):
         Grunnpoeng:
@@ -333,80 +1062,78 @@ def generate_variants(original_name: str, ending_map: dict[str, str]) -> list[tu
             +8: Første bokstav matcher
             -15: Første bokstav matcher IKKE (forhindrer "vinsteren"→"ISTEREN")
     """
-    variants = []
+    normalize = normalize_vassdrag_navn
 
     # 1. Originalnavn (score 100)
-    variants.append((original_name, 100, "original"))
+    yield (original_name, 100, "original")
 
     # 1b. Hvis originalnavn ikke allerede slutter på vassdrag-relaterte suffix,
     # prøv å legge til "vassdraget", "ELV", "VANN" (høyere score enn fuzzy)
     # Dette håndterer søk som "Glomma" → "Glommavassdraget"
     lower_name = original_name.lower()
-    has_vassdrag_suffix = any(
-        lower_name.endswith(suffix)
-        for suffix in ["vassdraget", "vassdragene", "vassdrag", "vasdrag", "elv", "elva",
-                       "vann", "vatn", "sjø", "tjern", "bekk", "å"]
-    )
+    has_vassdrag_suffix = lower_name.endswith(_VASSDRAG_SUFFIX_CHECK)
 
     if not has_vassdrag_suffix and len(original_name) > 3:
         # Prøv med "vassdraget" (score 99 - høyere enn fuzzy med prefix bonus)
         # Dette sikrer at "Glomma" → "Glommavassdraget" scorer høyere enn fuzzy "GLÅMA"
-        variants.append((original_name + "vassdraget", 99, "add_vassdraget"))
+        yield (original_name + "vassdraget", 99, "add_vassdraget")
 
         # Prøv også med normaliserte suffix
-        variants.append((original_name + "ELV", 98, "add_ELV"))
-        variants.append((original_name + "VANN", 97, "add_VANN"))
+        yield (original_name + "ELV", 98, "add_ELV")
+        yield (original_name + "VANN", 97, "add_VANN")
+
+    # Resten samles i en liste før de yieldes
+    variants = []
+    append = variants.append
 
     # 2. Normalisert navn (score 90)
-    normalized = normalize_vassdrag_navn(original_name, ending_map)
+    normalized = normalize(original_name, ending_map)
     if normalized and normalized != original_name:
-        variants.append((normalized, 90, "normalized"))
+        append((normalized, 90, "normalized"))
 
         # 2b. Fjern normaliserte kategorier for å finne stammen
         # Eksempel: "BandakVANN" → "Bandak"
-        normalized_categories = ["ELV_SAMISK", "VANN_SAMISK", "ELV", "VANN", "DAL", "FJORD", "FJELL"]
-        for category in normalized_categories:
+        for category in _NORMALIZED_CATEGORIES:
             if normalized.endswith(category):
                 # Finn stammen ved å fjerne kategorien
                 stem_from_normalized = normalized[:-len(category)]
                 if stem_from_normalized and stem_from_normalized != original_name:
-                    variants.append((stem_from_normalized, 85, "normalized_stem"))
+                    append((stem_from_normalized, 85, "normalized_stem"))
                 break
 
     # 3. Prøv uten retningsord (score 87)
     # Fjern ord som "nordre", "søndre", "østre", "vestre", "øvre", "nedre", "gamle"
-    directional_prefixes = ["nordre", "søndre", "østre", "vestre", "øvre", "nedre", "gamle", "nørdre", "søndre"]
     words = original_name.split()
     if len(words) > 1:
         first_word_lower = words[0].lower()
-        if first_word_lower in directional_prefixes:
+        if first_word_lower in _DIRECTIONAL_PREFIXES:
             # Fjern første ord og lag nytt navn
             without_directional = " ".join(words[1:])
             if without_directional:
-                variants.append((without_directional, 87, "no_directional"))
+                append((without_directional, 87, "no_directional"))
 
                 # Prøv også å normalisere navnet uten retningsord
-                normalized_no_dir = normalize_vassdrag_navn(without_directional, ending_map)
+                normalized_no_dir = normalize(without_directional, ending_map)
                 if normalized_no_dir and normalized_no_dir != without_directional:
-                    variants.append((normalized_no_dir, 86, "no_directional_normalized"))
+                    append((normalized_no_dir, 86, "no_directional_normalized"))
 
     # 4. Navn uten bindestrek (score 80)
     if '-' in original_name:
         no_hyphen = original_name.replace('-', '')
-        variants.append((no_hyphen, 80, "no_hyphen"))
+        append((no_hyphen, 80, "no_hyphen"))
 
     # 4-7. Stamme-baserte varianter
-    lower_name = original_name.lower()
     stem = None
     suffix_found = None
 
-    # Finn stammen ved å fjerne vanlige suffix
-    for suffix in ["vassdragene", "vassdraget", "vassdrag", "vasdrag", "reguleringen"]:
-        if lower_name.endswith(suffix):
-            stem_len = len(original_name) - len(suffix)
-            stem = original_name[:stem_len]
-            suffix_found = suffix
-            break
+    # Finn stammen ved å fjerne vanlige suffix (hopp over løkken når ingen passer)
+    if lower_name.endswith(_STEM_SUFFIXES):
+        for suffix in _STEM_SUFFIXES:
+            if lower_name.endswith(suffix):
+                stem_len = len(original_name) - len(suffix)
+                stem = original_name[:stem_len]
+                suffix_found = suffix
+                break
 
     # Hvis ingen suffix funnet, bruk hele navnet som stamme
     if stem is None:
@@ -416,99 +1143,133 @@ def generate_variants(original_name: str, ending_map: dict[str, str]) -> list[tu
         # 3a. Prøv å normalisere stammen først (for bedre matching)
         # Eksempel: "josteDal" → "josteDAL" matcher "Jostedøla" i indeksen
         if suffix_found:  # Bare hvis vi faktisk fjernet et suffix
-            stem_normalized = normalize_vassdrag_navn(stem, ending_map)
+            stem_normalized = normalize(stem, ending_map)
             if stem_normalized and stem_normalized != stem and stem_normalized != normalized:
-                variants.append((stem_normalized, 88, "stem_normalized"))
+                append((stem_normalized, 88, "stem_normalized"))
 
             # Prøv også bare stammen (høyere score hvis vi fjernet et suffix)
-            variants.append((stem, 82, "stem_only"))
+            append((stem, 82, "stem_only"))
 
-        # Primære suffixes: mest relevante for vassdrag
-        primary_suffixes = ["ELV", "VANN", "vassdraget"]
-        # Sekundære suffixes: mindre sannsynlige for vassdrag
-        secondary_suffixes = ["FJORD", "DAL", "FJELL"]
+        stem_s = stem + "s"
+        stem_a = stem + "a"
+        stem_short = stem[:-1] if len(stem) > 2 else None
 
         # Prøv primære suffixes først (høyere score)
-        for suffix in primary_suffixes:
+        for suffix in _PRIMARY_SUFFIXES:
             # Stamme + suffix
-            variant = stem + suffix
-            variants.append((variant, 75, f"stem+{suffix}"))
+            append((stem + suffix, 75, f"stem+{suffix}"))
 
             # Stamme + 's' + suffix
-            variant = stem + "s" + suffix
-            variants.append((variant, 55, f"stem+s+{suffix}"))
+            append((stem_s + suffix, 55, f"stem+s+{suffix}"))
 
             # Stamme uten siste bokstav + suffix
-            if len(stem) > 2:
-                variant = stem[:-1] + suffix
-                variants.append((variant, 50, f"stem-1+{suffix}"))
+            if stem_short is not None:
+                append((stem_short + suffix, 50, f"stem-1+{suffix}"))
 
             # Stamme + 'a' + suffix
-            variant = stem + "a" + suffix
-            variants.append((variant, 45, f"stem+a+{suffix}"))
+            append((stem_a + suffix, 45, f"stem+a+{suffix}"))
 
         # Prøv sekundære suffixes (lavere score)
-        for suffix in secondary_suffixes:
+        for suffix in _SECONDARY_SUFFIXES:
             # Stamme + suffix
-            variant = stem + suffix
-            variants.append((variant, 65, f"stem+{suffix}"))
+            append((stem + suffix, 65, f"stem+{suffix}"))
 
             # Stamme + 's' + suffix
-            variant = stem + "s" + suffix
-            variants.append((variant, 45, f"stem+s+{suffix}"))
+            append((stem_s + suffix, 45, f"stem+s+{suffix}"))
 
             # Stamme uten siste bokstav + suffix
-            if len(stem) > 2:
-                variant = stem[:-1] + suffix
-                variants.append((variant, 40, f"stem-1+{suffix}"))
+            if stem_short is not None:
+                append((stem_short + suffix, 40, f"stem-1+{suffix}"))
 
             # Stamme + 'a' + suffix
-            variant = stem + "a" + suffix
-            variants.append((variant, 35, f"stem+a+{suffix}"))
+            append((stem_a + suffix, 35, f"stem+a+{suffix}"))
 
         # Bare stammen (score 30) - kun hvis vi ikke fjernet et suffix
         # (hvis vi fjernet suffix, har vi allerede lagt til stemmen med score 82)
         if stem != original_name and not suffix_found:
-            variants.append((stem, 30, "stem_only"))
+            append((stem, 30, "stem_only"))
 
-    # 9. Håndter foss/fall-suffix
-    foss_suffixes = ["fossen", "foss", "faldene", "fallet", "fall", "fossan", "fosane"]
+    # 9. Håndter foss/fall-suffix (hopp over løkken når ingen passer)
+    if lower_name.endswith(_FOSS_SUFFIXES):
+        for foss_suffix in _FOSS_SUFFIXES:
+            if not lower_name.endswith(foss_suffix):
+                continue
 
-    for foss_suffix in foss_suffixes:
-        if lower_name.endswith(foss_suffix):
             stem_len = len(original_name) - len(foss_suffix)
             foss_stem = original_name[:stem_len]
 
             # Prøv bare stammen
-            variants.append((foss_stem, 30, "foss_stem"))
+            append((foss_stem, 30, "foss_stem"))
 
             # Prøv primære suffixes (høyere score)
-            for suffix in ["vassdraget", "ELV", "VANN"]:
-                variant = foss_stem + suffix
-                variants.append((variant, 35, f"foss_stem+{suffix}"))
+            for suffix in _FOSS_PRIMARY_SUFFIXES:
+                append((foss_stem + suffix, 35, f"foss_stem+{suffix}"))
 
             # Prøv sekundære suffixes (lavere score)
-            for suffix in ["DAL", "FJORD"]:
-                variant = foss_stem + suffix
-                variants.append((variant, 25, f"foss_stem+{suffix}"))
+            for suffix in _FOSS_SECONDARY_SUFFIXES:
+                append((foss_stem + suffix, 25, f"foss_stem+{suffix}"))
 
             # Stamme uten 's' på slutten
             if foss_stem.endswith('s'):
                 short_stem = foss_stem[:-1]
                 # Bare stamme
-                variants.append((short_stem, 30, "foss_short_stem"))
+                append((short_stem, 30, "foss_short_stem"))
                 # Med primære suffixes
-                for suffix in ["vassdraget", "ELV", "VANN"]:
-                    variant = short_stem + suffix
-                    variants.append((variant, 35, f"foss_short_stem+{suffix}"))
+                for suffix in _FOSS_PRIMARY_SUFFIXES:
+                    append((short_stem + suffix, 35, f"foss_short_stem+{suffix}"))
                 # Med sekundære suffixes
-                for suffix in ["DAL", "FJORD"]:
-                    variant = short_stem + suffix
-                    variants.append((variant, 25, f"foss_short_stem+{suffix}"))
+                for suffix in _FOSS_SECONDARY_SUFFIXES:
+                    append((short_stem + suffix, 25, f"foss_short_stem+{suffix}"))
 
             break  # Bare første matchende foss-suffix
 
-    return variants
+    yield from variants
+
+
+def _prefix_bonus(matched_lower: str, search_lower: str, distance: int) -> int:
+    """
+    Prefix matching for fuzzy-treff: bonus hvis starten matcher, penalty hvis ikke.
+    Begge strengene må allerede være lowercase.
+
+    Dette er kritisk for å unngå dårlige matcher som "vinsteren" → "ISTEREN":
+        +25: Startswith match (ett navn starter med det andre, minst 3 tegn)
+        +12: Første 2 bokstaver matcher
+        +8: Første bokstav matcher
+        -15: Første bokstav matcher IKKE (og distance >= 1)
+    """
+    if not matched_lower or not search_lower:
+        return 0
+
+    # Sjekk for startswith (stor bonus hvis ett navn starter med det andre)
+    # F.eks. "suldal" matcher "suldalsvassdraget"
+    # Minimum lengde 3 for å unngå falske positive
+    if len(search_lower) >= 3 and len(matched_lower) >= 3:
+        if matched_lower.startswith(search_lower) or search_lower.startswith(matched_lower):
+            return 25
+
+    # Hvis ikke startswith, sjekk første bokstaver
+    if matched_lower[0] == search_lower[0]:
+        # +4 ekstra hvis første 2 bokstaver matcher
+        if len(matched_lower) >= 2 and len(search_lower) >= 2 and matched_lower[:2] == search_lower[:2]:
+            return 12
+        return 8
+
+    # Stor penalty hvis første bokstav IKKE matcher
+    if distance >= 1:
+        return -15
+    return 0
+
+
+@lru_cache(maxsize=256)
+def _make_match_type(variant_type: str, field: str, distance: int) -> str:
+    """
+    match_type for fuzzy-treff, f.eks. "fuzzy_navn_dist1" eller
+    "normalized_fuzzy_navn_dist1" (variant_type="" for originalnavnet).
+    Det finnes bare en håndfull kombinasjoner, så strengene bygges og interneres én gang.
+    """
+    if variant_type:
+        return sys.intern(f"{variant_type}_fuzzy_{field}_dist{distance}")
+    return sys.intern(f"fuzzy_{field}_dist{distance}")
 
 
 def calculate_vassdragsnr_bonus(vassdragsnr: str) -> int:
@@ -530,20 +1291,7 @@ def calculate_vassdragsnr_bonus(vassdragsnr: str) -> int:
         7 tegn: +2
         8+ tegn: +0
     """
-    length = len(vassdragsnr)
-
-    if length <= 3:
-        return 10
-    elif length == 4:
-        return 8
-    elif length == 5:
-        return 6
-    elif length == 6:
-        return 4
-    elif length == 7:
-        return 2
-    else:
-        return 0
+    return _VNR_BONUS[min(len(vassdragsnr), 8)]
 
 
 def resolve_vassdrag_single(
@@ -575,41 +1323,72 @@ def resolve_vassdrag_single(
             "match_type": str
         }
     """
+    # Resultatet caches per (navn, stier, max_results) som uforanderlige Match-tupler;
+    # hver kalle får nye dicts den kan endre (f.eks. resolve_composite_vassdrag)
+    cached = _resolve_vassdrag_single_cached(vassdragsforslag, ending_map_path, regine_index_path, max_results)
+    return [match.as_dict() for match in cached]
+
+
+@lru_cache(maxsize=4096)
+def _resolve_vassdrag_single_cached(
+    vassdragsforslag: str,
+    ending_map_path: Path,
+    regine_index_path: Path,
+    max_results: int
+) -> tuple[Match, ...]:
+    """Selve oppslaget for resolve_vassdrag_single."""
     # Last inn data
     ending_map = load_ending_map(ending_map_path)
-    regine_index = load_regine_index(regine_index_path)
+    regine_index = load_regine_columns(regine_index_path)
+
+    # Normaliser søkenavnet én gang for startswith- og fuzzy-rundene
+    query = NormalizedQuery.from_text(vassdragsforslag)
+
+    # Søk etter matcher. Kandidatene lagres i parallelle lister, og dicts
+    # bygges bare for de max_results beste til slutt.
+    scores = []
+    entries = []
+    matched_variants = []
+    match_types = []
+    vassdragsnr_bonuses = []
+    prefix_bonuses = []  # None for eksakte treff (de har ingen prefix-bonus)
+    seen_vassdragsnr = set()  # Unngå duplikater
 
-    # Generer alle varianter
+    def add_match(entry, matched_variant, score, match_type, vassdragsnr_bonus, prefix_bonus=None):
+        scores.append(score)
+        entries.append(entry)
+        matched_variants.append(matched_variant)
+        match_types.append(match_type)
+        vassdragsnr_bonuses.append(vassdragsnr_bonus)
+        prefix_bonuses.append(prefix_bonus)
+        seen_vassdragsnr.add(entry["vassdragsnr"])
+
+    # Variantene prøves i genereringsrekkefølge (den avgjør hvilken variant som
+    # beholdes per vassdragsnr). remaining_max[i] er høyeste score blant
+    # variants[i:]: når vi har max_results matcher og selv den pluss maks
+    # vassdragsnr-bonus (+10) ikke slår den N-te beste, kan ingen gjenværende
+    # variant komme med i topp-N, og vi stopper.
     variants = generate_variants(vassdragsforslag, ending_map)
+    remaining_max = list(accumulate(reversed([score for _variant, score, _type in variants]), max))
+    remaining_max.reverse()
+    for i, (variant, score, match_type) in enumerate(variants):
+        if max_results > 0 and len(scores) >= max_results:
+            nth_best = heapq.nlargest(max_results, scores)[-1]
+            if remaining_max[i] + _VNR_BONUS[0] <= nth_best:
+                break
 
-    # Søk etter matcher
-    matches = []
-    seen_vassdragsnr = set()  # Unngå duplikater
-
-    for variant, score, match_type in variants:
         match = find_exact_match(variant, regine_index)
         if match and match["vassdragsnr"] not in seen_vassdragsnr:
             # Legg til bonus basert på vassdragsnr lengde
             vassdragsnr_bonus = calculate_vassdragsnr_bonus(match["vassdragsnr"])
             final_score = score + vassdragsnr_bonus
 
-            matches.append({
-                "original_input": vassdragsforslag,
-                "matched_navn": match["navn"],
-                "matched_variant": variant,
-                "vassdragsnr": match["vassdragsnr"],
-                "lat": match["lat"],
-                "long": match["long"],
-                "score": final_score,
-                "match_type": match_type,
-                "vassdragsnr_bonus": vassdragsnr_bonus
-            })
-            seen_vassdragsnr.add(match["vassdragsnr"])
+            add_match(match, variant, final_score, match_type, vassdragsnr_bonus)
 
     # Hvis vi ikke fant nok matcher, prøv startswith matching
     # Dette fanger opp matches som "suldal" → "suldalsvassdraget"
-    if len(matches) < max_results:
-        startswith_matches = find_startswith_matches(vassdragsforslag, regine_index, min_length=3)
+    if len(scores) < max_results:
+        startswith_matches = find_startswith_matches(query, regine_index, min_length=3)
 
         for match, field in startswith_matches:
             if match["vassdragsnr"] not in seen_vassdragsnr:
@@ -619,32 +1398,18 @@ def resolve_vassdrag_single(
                 # Legg til bonus basert på vassdragsnr lengde
                 vassdragsnr_bonus = calculate_vassdragsnr_bonus(match["vassdragsnr"])
 
-                # Legg til ekstra bonus hvis search_lower er identisk med starten
-                matched_value = match[field].lower() if match.get(field) else ""
-                search_lower = vassdragsforslag.lower()
                 prefix_bonus = 25  # Startswith får alltid +25 bonus
 
                 final_score = base_score + vassdragsnr_bonus + prefix_bonus
 
-                matches.append({
-                    "original_input": vassdragsforslag,
-                    "matched_navn": match["navn"],
-                    "matched_variant": match[field],
-                    "vassdragsnr": match["vassdragsnr"],
-                    "lat": match["lat"],
-                    "long": match["long"],
-                    "score": final_score,
-                    "match_type": f"startswith_{field}",
-                    "vassdragsnr_bonus": vassdragsnr_bonus,
-                    "prefix_bonus": prefix_bonus
-                })
-                seen_vassdragsnr.add(match["vassdragsnr"])
+                add_match(match, match[field], final_score, _STARTSWITH_MATCH_TYPES[field], vassdragsnr_bonus, prefix_bonus)
 
     # Hvis vi ikke fant nok matcher, prøv fuzzy matching
     # Score for fuzzy matches: 95 (distance 0), 92 (distance 1), 89 (distance 2)
-    if len(matches) < max_results:
+    if len(scores) < max_results:
         # Først: kjør fuzzy matching på originalnavn
-        fuzzy_matches = find_fuzzy_matches(vassdragsforslag, regine_index, max_distance=2, min_length=5)
+        fuzzy_matches = find_fuzzy_matches(query, regine_index, max_distance=2, min_length=5)
+        search_lower = query.lower
 
         for match, distance, field in fuzzy_matches:
             if match["vassdragsnr"] not in seen_vassdragsnr:
@@ -652,56 +1417,19 @@ def resolve_vassdrag_single(
                 fuzzy_score = 95 - (distance * 3)  # 95, 92, 89 for distance 0, 1, 2
 
                 # Prefix matching: bonus hvis matcher, penalty hvis ikke
-                # Dette er kritisk for å unngå dårlige matcher som "vinsteren" → "ISTEREN"
-                matched_value = match[field].lower() if match.get(field) else ""
-                search_lower = vassdragsforslag.lower()
-                prefix_bonus = 0
-
-                if matched_value and search_lower:
-                    # Sjekk for startswith (stor bonus hvis ett navn starter med det andre)
-                    # F.eks. "suldal" matcher "suldalsvassdraget"
-                    # Minimum lengde 3 for å unngå falske positive
-                    if len(search_lower) >= 3 and len(matched_value) >= 3:
-                        if matched_value.startswith(search_lower) or search_lower.startswith(matched_value):
-                            prefix_bonus = 25  # Stor bonus for startswith match
-
-                    # Hvis ikke startswith, sjekk første bokstaver
-                    if prefix_bonus == 0:
-                        if matched_value[0] == search_lower[0]:
-                            # +8 bonus hvis første bokstav matcher
-                            prefix_bonus = 8
-
-                            # +4 ekstra hvis første 2 bokstaver matcher
-                            if len(matched_value) >= 2 and len(search_lower) >= 2:
-                                if matched_value[:2] == search_lower[:2]:
-                                    prefix_bonus = 12
-                        else:
-                            # Stor penalty hvis første bokstav IKKE matcher
-                            # Dette forhindrer "vinsteren" → "ISTEREN" matches
-                            if distance >= 1:
-                                prefix_bonus = -15  # Penalty!
+                matched_lower = match[field].lower() if match.get(field) else ""
+                prefix_bonus = _prefix_bonus(matched_lower, search_lower, distance)
 
                 # Legg til bonus basert på vassdragsnr lengde
                 vassdragsnr_bonus = calculate_vassdragsnr_bonus(match["vassdragsnr"])
                 final_score = fuzzy_score + vassdragsnr_bonus + prefix_bonus
 
-                matches.append({
-                    "original_input": vassdragsforslag,
-                    "matched_navn": match["navn"],
-                    "matched_variant": match[field],  # Vis hvilket felt som matchet
-                    "vassdragsnr": match["vassdragsnr"],
-                    "lat": match["lat"],
-                    "long": match["long"],
-                    "score": final_score,
-                    "match_type": f"fuzzy_{field}_dist{distance}",
-                    "vassdragsnr_bonus": vassdragsnr_bonus,
-                    "prefix_bonus": prefix_bonus
-                })
-                seen_vassdragsnr.add(match["vassdragsnr"])
+                add_match(match, match[field], final_score, _make_match_type("", field, distance),
+                          vassdragsnr_bonus, prefix_bonus)
 
     # Hvis vi fortsatt ikke har nok matcher, prøv fuzzy matching på viktige varianter
     # Spesielt "no_directional" varianten
-    if len(matches) < max_results:
+    if len(scores) < max_results:
         important_variants = [
             (variant, base_score, match_type)
             for variant, base_score, match_type in variants
@@ -709,10 +1437,12 @@ def resolve_vassdrag_single(
         ]
 
         for variant, base_score, match_type in important_variants:
-            if len(matches) >= max_results:
+            if len(scores) >= max_results:
                 break
 
-            variant_fuzzy_matches = find_fuzzy_matches(variant, regine_index, max_distance=2, min_length=5)
+            variant_query = NormalizedQuery.from_text(variant)
+            variant_fuzzy_matches = find_fuzzy_matches(variant_query, regine_index, max_distance=2, min_length=5)
+            variant_lower = variant_query.lower
 
             for match, distance, field in variant_fuzzy_matches:
                 if match["vassdragsnr"] not in seen_vassdragsnr:
@@ -722,54 +1452,34 @@ def resolve_vassdrag_single(
                     fuzzy_score = max(base_score - fuzzy_penalty, 50)  # Minimum 50
 
                     # Prefix matching: bonus hvis matcher, penalty hvis ikke
-                    matched_value = match[field].lower() if match.get(field) else ""
-                    variant_lower = variant.lower()
-                    prefix_bonus = 0
-
-                    if matched_value and variant_lower:
-                        # Sjekk for startswith (stor bonus hvis ett navn starter med det andre)
-                        # F.eks. "suldal" matcher "suldalsvassdraget"
-                        # Minimum lengde 3 for å unngå falske positive
-                        if len(variant_lower) >= 3 and len(matched_value) >= 3:
-                            if matched_value.startswith(variant_lower) or variant_lower.startswith(matched_value):
-                                prefix_bonus = 25  # Stor bonus for startswith match
-
-                        # Hvis ikke startswith, sjekk første bokstaver
-                        if prefix_bonus == 0:
-                            if matched_value[0] == variant_lower[0]:
-                                # +8 bonus hvis første bokstav matcher
-                                prefix_bonus = 8
-
-                                # +4 ekstra hvis første 2 bokstaver matcher
-                                if len(matched_value) >= 2 and len(variant_lower) >= 2:
-                                    if matched_value[:2] == variant_lower[:2]:
-                                        prefix_bonus = 12
-                            else:
-                                # Stor penalty hvis første bokstav IKKE matcher
-                                if distance >= 1:
-                                    prefix_bonus = -15  # Penalty!
+                    matched_lower = match[field].lower() if match.get(field) else ""
+                    prefix_bonus = _prefix_bonus(matched_lower, variant_lower, distance)
 
                     # Legg til bonus basert på vassdragsnr lengde
                     vassdragsnr_bonus = calculate_vassdragsnr_bonus(match["vassdragsnr"])
                     final_score = fuzzy_score + vassdragsnr_bonus + prefix_bonus
 
-                    matches.append({
-                        "original_input": vassdragsforslag,
-                        "matched_navn": match["navn"],
-                        "matched_variant": match[field],
-                        "vassdragsnr": match["vassdragsnr"],
-                        "lat": match["lat"],
-                        "long": match["long"],
-                        "score": final_score,
-                        "match_type": f"{match_type}_fuzzy_{field}_dist{distance}",
-                        "vassdragsnr_bonus": vassdragsnr_bonus,
-                        "prefix_bonus": prefix_bonus
-                    })
-                    seen_vassdragsnr.add(match["vassdragsnr"])
-
-    # Sorter etter score (høyest først) og returner topp-N
-    matches.sort(key=lambda x: x["score"], reverse=True)
-    return matches[:max_results]
+                    add_match(match, match[field], final_score, _make_match_type(match_type, field, distance),
+                              vassdragsnr_bonus, prefix_bonus)
+
+    # Topp-N etter score (høyest først, stabilt ved lik score) uten å sortere alle
+    top = heapq.nlargest(max_results, range(len(scores)), key=scores.__getitem__)
+
+    return tuple(
+        Match(
+            original_input=vassdragsforslag,
+            matched_navn=entries[i]["navn"],
+            matched_variant=matched_variants[i],
+            vassdragsnr=entries[i]["vassdragsnr"],
+            lat=entries[i]["lat"],
+            long=entries[i]["long"],
+            score=scores[i],
+            match_type=match_types[i],
+            vassdragsnr_bonus=vassdragsnr_bonuses[i],
+            prefix_bonus=prefix_bonuses[i],
+        )
+        for i in top
+    )
 
 
 def resolve_vassdrag(
@@ -835,12 +1545,20 @@ def resolve_vassdrag(
         ...     print(f"{m['score']}: {m['matched_navn']} ({m['vassdragsnr']})")
     """
     # Sjekk om dette er et sammensatt navn
-    if ' og ' in vassdragsforslag.lower() or '-' in vassdragsforslag:
+    if _COMPOSITE_DETECT.search(vassdragsforslag):
         return resolve_composite_vassdrag(vassdragsforslag, ending_map_path, regine_index_path, max_results)
     else:
         return resolve_vassdrag_single(vassdragsforslag, ending_map_path, regine_index_path, max_results)
 
 
+def _composite_executor() -> ThreadPoolExecutor:
+    """Trådpool for delene i sammensatte navn (opprettes ved første bruk)."""
+    global _COMPOSITE_EXECUTOR
+    if _COMPOSITE_EXECUTOR is None:
+        _COMPOSITE_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+    return _COMPOSITE_EXECUTOR
+
+
 def resolve_composite_vassdrag(
     vassdragsforslag: str,
     ending_map_path: Path = DEFAULT_ENDING_MAP_PATH,
@@ -851,44 +1569,48 @@ def resolve_composite_vassdrag(
     Håndterer sammensatte vassdragsnavn (med '-' eller 'og').
     Eksempel: 'Tokke-Vinjevassdraget' → søker etter 'Tokke' og 'Vinje' separat.
     """
-    # Split på " og " eller "-"
-    parts = []
-    if ' og ' in vassdragsforslag.lower():
-        parts = re.split(r'\s+og\s+', vassdragsforslag, flags=re.IGNORECASE)
+    # Split på " og " eller "-". Delene strippes én gang her og brukes videre
+    # uendret (None = ikke et sammensatt navn)
+    parts: Optional[list[str]] = None
+    if _OG_DETECT.search(vassdragsforslag):
+        # " og " gir alltid minst to deler; tomme deler hoppes over
+        parts = [part for part in map(str.strip, _OG_SPLIT.split(vassdragsforslag)) if part]
     elif '-' in vassdragsforslag:
-        potential_parts = vassdragsforslag.split('-')
-
         # Filtrer bort vanlige suffixer og korte deler
         cleaned_parts = []
-        for p in potential_parts:
-            p = p.strip()
-            if not p:
+        for part in vassdragsforslag.split('-'):
+            part = part.strip()
+            # Hopp over tomme og veldig korte deler (< 3 tegn)
+            if len(part) < 3:
                 continue
-            lower_p = p.lower()
             # Hopp over suffixer som "vassdragene", "vassdraget", etc.
-            if lower_p in ['vassdragene', 'vassdraget', 'vassdrag', 'kraftverk', 'verk']:
-                continue
-            # Hopp over veldig korte deler (< 3 tegn)
-            if len(p) < 3:
+            if part.lower() in _COMPOSITE_SUFFIXES:
                 continue
-            cleaned_parts.append(p)
+            cleaned_parts.append(part)
 
         if len(cleaned_parts) >= 2:
             parts = cleaned_parts
 
-    if not parts or len(parts) < 2:
+    if parts is None:
         # Ikke et sammensatt navn, søk som enkelt navn
         return resolve_vassdrag_single(vassdragsforslag, ending_map_path, regine_index_path, max_results)
 
     # Søk etter hver del
-    all_matches = []
-    for part in parts:
-        part = part.strip()
-        if not part:
-            continue
-
-        matches = resolve_vassdrag_single(part, ending_map_path, regine_index_path, max_results)
+    def resolve_part(part: str) -> list[dict]:
+        return resolve_vassdrag_single(part, ending_map_path, regine_index_path, max_results)
+
+    # Med rapidfuzz slipper avstandsberegningen GIL-en, så delene kan søkes
+    # parallelt. I ren Python ville trådene bare gått etter tur.
+    if _rapidfuzz_levenshtein is not None and len(parts) > 1:
+        # Last inn data før trådene starter, så de ikke bygger indeksen samtidig
+        load_ending_map(ending_map_path)
+        load_regine_columns(regine_index_path)
+        part_results = _composite_executor().map(resolve_part, parts)
+    else:
+        part_results = map(resolve_part, parts)
 
+    all_matches = []
+    for part, matches in zip(parts, part_results):
         # Legg til metadata om at dette er del av sammensatt navn
         for match in matches:
             match["original_input"] = vassdragsforslag  # Overstyr til fullt navn
@@ -896,11 +1618,73 @@ def resolve_composite_vassdrag(
             match["is_composite"] = True
             all_matches.append(match)
 
-    # Sorter etter score
-    all_matches.sort(key=lambda x: x["score"], reverse=True)
+    # Sorter etter score (alle deler returneres, så her trengs full sortering)
+    all_matches.sort(key=_score_key, reverse=True)
     return all_matches
 
 
+def resolve_vassdrag_batch(
+    vassdragsforslag_liste: Iterable[str],
+    ending_map_path: Path = DEFAULT_ENDING_MAP_PATH,
+    regine_index_path: Path = DEFAULT_REGINE_INDEX_PATH,
+    max_results: int = 10,
+    max_workers: Optional[int] = None
+) -> list[list[dict]]:
+    """
+    Slår opp mange vassdragsnavn på én gang.
+
+    Filene lastes én gang for hele batchen, og like navn slås bare opp én gang.
+    Med rapidfuzz og numpy installert beregnes fuzzy-kandidatene for alle navnene
+    i én rapidfuzz.process.cdist-matrise før oppslagene starter.
+    Store batcher bygger i tillegg en delete-indeks (se DeleteIndex) for fuzzy-søkene.
+
+    Args:
+        vassdragsforslag_liste: Vassdragsnavnene å slå opp
+        ending_map_path: Sti til ending_map.json
+        regine_index_path: Sti til INDEX_regine.json
+        max_results: Maksimalt antall resultater å returnere per del
+        max_workers: Antall tråder for unike navn (None eller 1 = sekvensielt)
+
+    Returns:
+        Én liste med matcher per input, i samme rekkefølge som input
+        (samme format som resolve_vassdrag()).
+    """
+    global _FUZZY_PREFILL
+    queries = list(vassdragsforslag_liste)
+
+    # Last inn data én gang før eventuelle tråder starter
+    load_ending_map(ending_map_path)
+    columns = load_regine_columns(regine_index_path)
+
+    unique_queries = list(dict.fromkeys(queries))
+
+    def resolve(query: str) -> list[dict]:
+        return resolve_vassdrag(query, ending_map_path, regine_index_path, max_results)
+
+    # Store batcher gjør mange nok fuzzy-søk til at delete-indeksen lønner seg
+    fast_fuzzy = _rapidfuzz_levenshtein is not None or _bounded_distances_jit is not None
+    if len(unique_queries) >= (_DELETE_INDEX_MIN_BATCH_FAST if fast_fuzzy else _DELETE_INDEX_MIN_BATCH):
+        _phonetic_delete_index(columns)
+
+    # Samme max_distance/min_length som første fuzzy-runde i resolve_vassdrag_single
+    if _rapidfuzz_process is not None and np is not None and len(unique_queries) > 1:
+        _FUZZY_PREFILL = (columns, _prefill_fuzzy_candidates(columns, unique_queries, 2, 5))
+
+    try:
+        if max_workers and max_workers > 1 and len(unique_queries) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(resolve, unique_queries))
+        else:
+            results = [resolve(query) for query in unique_queries]
+    finally:
+        _FUZZY_PREFILL = None
+
+    resolved = dict(zip(unique_queries, results))
+
+    # Kopier matchene så like input ikke deler de samme dict-objektene
+    return [[dict(match) for match in resolved[query]] for query in queries]
+
+
 if __name__ == "__main__":
     # Eksempel på bruk
     import sys
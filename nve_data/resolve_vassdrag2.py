@@ -18,21 +18,83 @@ eller flere vassdragsnavn og rangerer sannsynlige treff fra NVEs
 
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
+import mmap
+import os
+import pickle
 import re
 import sys
-from collections import defaultdict
-from dataclasses import dataclass
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 from functools import lru_cache
-from math import atan2, cos, radians, sin, sqrt
+from math import atan2, cos, isnan, nan, radians, sin, sqrt
+from os.path import commonprefix
 from pathlib import Path
-from typing import Callable, Iterable, Iterator, Sequence
+from typing import Callable, Iterable, Sequence
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson er valgfri - json.loads gir samme resultat, bare tregere
+    _json_loads = json.loads
+
+try:
+    from rapidfuzz import process as _rapidfuzz_process
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+except ImportError:  # rapidfuzz er valgfri - da brukes ren Python-Levenshtein
+    _rapidfuzz_process = None
+    _rapidfuzz_levenshtein = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy er valgfri - da beregnes avstander én og én
+    np = None
+
+if _rapidfuzz_levenshtein is None:
+    try:
+        import numba
+    except ImportError:  # numba er valgfri - brukes bare for Levenshtein når rapidfuzz mangler
+        numba = None
+else:
+    # Med rapidfuzz brukes aldri numba-kjernen; importen og lasting av den
+    # kompilerte kjernen ville ellers kostet ~0,3 s ved hver oppstart
+    numba = None
 
 DEFAULT_ENDING_MAP_PATH = Path(__file__).parent / "ending_map.json"
 DEFAULT_REGINE_INDEX_PATH = Path(__file__).parent / "INDEX_regine.json"
-
-
-@dataclass
+# Versjon av formatet i pickle-cachen (øk ved endringer i PreparedIndex)
+_PICKLE_CACHE_VERSION = 3
+
+_KRAFTVERK_RE = re.compile(r"\bkraftverk\b", re.IGNORECASE)
+_KRAFTSELSKAP_RE = re.compile(r"\bkraftselskap\b", re.IGNORECASE)
+_MULTISPACE_RE = re.compile(r"\s{2,}")
+_CONJUNCTION_RE = re.compile(r"\s+(?:og|&|\+/)\s+", re.IGNORECASE)
+_AA_RE = re.compile("aa", re.IGNORECASE)
+_REGULERINGEN_RE = re.compile(r"reguleringen$", re.IGNORECASE)
+_CATEGORY_TAIL_RE = re.compile(r"(.*?)(ELV|VANN|FJORD|DAL|FJELL)(?:\b|$)")
+_NON_LETTER_RE = re.compile(r"[^a-zæøå]")
+_REPEATED_CHAR_RE = re.compile(r"(.)\1", re.DOTALL)
+# Nøkkeltyper i PreparedIndex.merged_lookup
+_LOOKUP_NAVN = 0
+_LOOKUP_NORMALIZED = 1
+_LOOKUP_SWAP = 2
+# Kategori -> haler den kan byttes med (i søkerekkefølge)
+_SWAP_TAILS = {
+    "ELV": ("VANN", "FJORD"),
+    "VANN": ("ELV", "FJORD"),
+    "FJORD": ("ELV", "VANN"),
+}
+_SWAP_TAIL_RES = {
+    category: re.compile(rf"(.*?){category}(\b|$)") for category in _SWAP_TAILS
+}
+
+
+@dataclass(slots=True)
 class MatchResult:
     """Beskrivelse av et match-resultat."""
 
@@ -43,6 +105,7 @@ class MatchResult:
     entry: dict
     coord_bonus: int = 0
     base_score: int = 0
+    entry_index: int | None = None
 
     def as_dict(self) -> dict:
         """Returner resultatet som et serialiserbart dictionary."""
@@ -64,7 +127,11 @@ class MatchResult:
 
 @dataclass
 class PreparedEntry:
-    """Forhåndsberegnede felt for en indeksoppføring."""
+    """Forhåndsberegnede felt for en indeksoppføring.
+
+    Indeksen lagres kolonnevis i :class:`PreparedIndex`; denne klassen er en
+    radvisning laget ved behov via :meth:`PreparedIndex.prepared_entry`.
+    """
 
     entry: dict
     navn: str | None
@@ -75,24 +142,130 @@ class PreparedEntry:
     category: str | None
     stem: str
     first_letter: str
+    navn_casefold: str = ""
+    navn_clean: str = ""
+    # Koordinater i radianer og cos(lat), NaN når oppføringen mangler koordinater
+    lon_rad: float = nan
+    lat_rad: float = nan
+    cos_lat: float = nan
 
 
 @dataclass
 class PreparedIndex:
-    """Akselererte oppslagsstrukturer for Regine-indeksen."""
+    """Akselererte oppslagsstrukturer for Regine-indeksen.
+
+    De forhåndsberegnede feltene lagres som parallelle tuples (struct-of-arrays)
+    indeksert likt med ``entries``, slik at søkeløkkene slipper attributtoppslag
+    per oppføring.
+    """
 
     entries: Sequence[dict]
-    prepared_entries: list[PreparedEntry]
-    navn_lookup: dict[str, tuple[int, ...]]
-    navn_normalized_lookup: dict[str, tuple[int, ...]]
+    navns: tuple[str | None, ...]
+    navn_casefolds: tuple[str, ...]
+    navn_cleans: tuple[str, ...]
+    navn_signatures: tuple[str, ...]
+    stem_signatures: tuple[str, ...]
+    navn_signature_codes: tuple[int, ...]
+    stem_signature_codes: tuple[int, ...]
+    stem_cleans: tuple[str, ...]
+    normalized_names: tuple[str, ...]
+    categories: tuple[str | None, ...]
+    stems: tuple[str, ...]
+    first_letters: tuple[str, ...]
+    lon_rads: tuple[float, ...]
+    lat_rads: tuple[float, ...]
+    cos_lats: tuple[float, ...]
+    # Rå «vassdragsnr», nøkkelen str(vassdragsnr) og straffen for lange nummer
+    vassdragsnrs: tuple[object, ...]
+    vassdragsnr_keys: tuple[str, ...]
+    vassdragsnr_penalties: tuple[int, ...]
+    # (_LOOKUP_*, casefoldet verdi) -> indekser; for _LOOKUP_SWAP er verdiene
+    # (hale, indeks)-par, se _build_swap_lookup
+    merged_lookup: dict[tuple[int, str], tuple]
+    navn_sorted: tuple[str, ...]
+    navn_normalized_sorted: tuple[str, ...]
     first_letter_lookup: dict[str, tuple[int, ...]]
-    all_indices: tuple[int, ...]
+    # Forbokstav -> BK-tre over navne- og stammesignaturene, se _bktree_insert
+    phonetic_bktrees: dict[str, list]
+    # LRU-cache for resolve_vassdrag: (renset tekst, coord) -> resultater
+    resolve_cache: OrderedDict[tuple, list[dict]] = field(
+        default_factory=OrderedDict, repr=False, compare=False
+    )
+
+    def prepared_entry(self, idx: int) -> PreparedEntry:
+        """Sett sammen feltene for oppføring ``idx`` til en :class:`PreparedEntry`."""
+
+        return PreparedEntry(
+            entry=self.entries[idx],
+            navn=self.navns[idx],
+            navn_signature=self.navn_signatures[idx],
+            stem_signature=self.stem_signatures[idx],
+            stem_clean=self.stem_cleans[idx],
+            normalized_name=self.normalized_names[idx],
+            category=self.categories[idx],
+            stem=self.stems[idx],
+            first_letter=self.first_letters[idx],
+            navn_casefold=self.navn_casefolds[idx],
+            navn_clean=self.navn_cleans[idx],
+            lon_rad=self.lon_rads[idx],
+            lat_rad=self.lat_rads[idx],
+            cos_lat=self.cos_lats[idx],
+        )
 
 
+@dataclass(frozen=True, eq=False)
+class _SuffixTable:
+    """Haler og ending_map samlet i ett objekt som hashes på identitet.
+
+    Brukes som nøkkel for ``lru_cache`` på hjelpere som ellers ville tatt et
+    (uhashbart) dictionary som argument.
+    """
+
+    ending_map: dict[str, str]
+    suffixes: tuple[str, ...]
+    # Hale (små bokstaver) -> sammenslått kategori, ferdig oppslått
+    categories: dict[str, str] = field(default_factory=dict)
+
+
+# Detaljerte kategorier fra ending_map slått sammen til de vi matcher på
+_CATEGORY_COLLAPSE = {
+    "ELV": "ELV",
+    "ELV_SAMISK": "ELV",
+    "VANN": "VANN",
+    "VANN_SAMISK": "VANN",
+    "FJORD": "FJORD",
+    "DAL": "DAL",
+    "FJELL": "FJELL",
+}
+
+# Sist brukte indeks (identitetssjekket), pluss svake referanser nøklet på
+# innholdshash (eller fil og mtime for indekser lest fra fil) slik at separat
+# innlastede, like indekser deler strukturer.
 _PREPARED_INDEX_CACHE: tuple[
-    tuple[int, int, tuple[str, ...]],
+    Sequence[dict],
+    dict[str, str],
+    tuple[str, ...],
     PreparedIndex,
 ] | None = None
+_PREPARED_INDEX_BY_CONTENT: weakref.WeakValueDictionary[object, PreparedIndex] = (
+    weakref.WeakValueDictionary()
+)
+# Sist innleste indeks fra load_regine_index: (liste, sti, (mtime_ns, størrelse)).
+# Bare en slik indeks får PreparedIndex lagret i pickle-cache ved siden av filen;
+# lister laget i minnet har ingen fil å knytte cachen til.
+_LOADED_REGINE_INDEX: tuple[list[dict], Path, tuple[int, int]] | None = None
+_RESOLVE_CACHE_SIZE = 4096
+# Laveste poengsum (etter koordinatbonus) som tas med i resultatet
+_MIN_RESULT_SCORE = 30
+# Fra så mange oppføringer lønner det seg å regne signaturavstandene i ett
+# rapidfuzz.process.cdist-kall (færre blir raskere med ett kall per par)
+_CDIST_MIN_ENTRIES = 64
+# Forkastede fonetiske treff logges når signaturavstanden er høyst dette
+_PHONETIC_DEBUG_DISTANCE = 3
+_SCORE_EXECUTOR: ThreadPoolExecutor | None = None
+_SUFFIXES_CACHE: tuple[dict[str, str], tuple[str, ...]] | None = None
+_SUFFIX_TABLE_CACHE: _SuffixTable | None = None
+_SUFFIX_TRIE_CACHE: tuple[tuple[str, ...], dict] | None = None
 
 
 @lru_cache(maxsize=1)
@@ -102,24 +275,33 @@ def load_ending_map(path: Path = DEFAULT_ENDING_MAP_PATH) -> dict[str, str]:
     if not path.exists():  # pragma: no cover - defensiv beskyttelse
         raise FileNotFoundError(f"Fant ikke ending_map.json på {path}")
 
-    with path.open(encoding="utf-8") as handle:
-        data: dict[str, str] = json.load(handle)
-
+    data: dict[str, str] = _json_loads(path.read_bytes())
     return data
 
 
 @lru_cache(maxsize=1)
 def load_regine_index(path: Path = DEFAULT_REGINE_INDEX_PATH) -> list[dict]:
-    """Last ``INDEX_regine.json`` som en liste av dictionaries."""
+    """Last ``INDEX_regine.json`` som en liste av dictionaries.
+
+    Første gang parses JSON-filen, og listen lagres i en pickle-cache ved
+    siden av (``*.entries.cache.pkl``). Senere prosesser leser cachen så
+    lenge JSON-filen har samme mtime og størrelse.
+    """
 
     if not path.exists():  # pragma: no cover - defensiv beskyttelse
         raise FileNotFoundError(
             "Fant ikke INDEX_regine.json. Kør build_regine_index.py først?"
         )
 
-    with path.open(encoding="utf-8") as handle:
-        entries: list[dict] = json.load(handle)
-
+    global _LOADED_REGINE_INDEX
+    stat = path.stat()
+    cache_key = (_PICKLE_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_path = path.with_name(path.stem + ".entries.cache.pkl")
+    entries = _read_pickle_cache(cache_path, cache_key)
+    if entries is None:
+        entries = _json_loads(path.read_bytes())
+        _write_pickle_cache(cache_path, cache_key, entries)
+    _LOADED_REGINE_INDEX = (entries, path, (stat.st_mtime_ns, stat.st_size))
     return entries
 
 
@@ -140,9 +322,9 @@ def resolve_vassdrag(
     indeksen. Angi ``coord=(lon, lat)`` for å tildele nærhetsbonus.
     """
 
-    text = re.sub(r"\bkraftverk\b", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\bkraftselskap\b", "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s{2,}", " ", text)
+    text = _KRAFTVERK_RE.sub("", text)
+    text = _KRAFTSELSKAP_RE.sub("", text)
+    text = _MULTISPACE_RE.sub(" ", text)
     text = text.strip()
     if not text:
         return []
@@ -164,32 +346,100 @@ def resolve_vassdrag(
 
     suffixes = _collect_suffixes(ending_map)
     prepared_index = _get_prepared_index(regine_index, ending_map, suffixes)
+
+    # Gjentatte oppslag besvares fra cachen (ikke i debugmodus, der loggen trengs)
+    cache_key = (text, tuple(coord) if coord is not None else None)
+    resolve_cache = prepared_index.resolve_cache
+    if not debug:
+        cached = resolve_cache.get(cache_key)
+        if cached is not None:
+            # En annen tråd kan ha kastet ut nøkkelen etter get(); treffet er like gyldig
+            try:
+                resolve_cache.move_to_end(cache_key)
+            except KeyError:
+                pass
+            return [dict(item) for item in cached]
+
     all_results: list[MatchResult] = []
 
     raw_names = split_vassdrag_names(text, suffixes=suffixes)
     log(f"Identifiserte delnavn: {raw_names}")
 
-    for raw_name in raw_names:
-        log(f"Behandler vassdragsnavn: {raw_name!r}")
-        candidate_results = _score_single_name(
-            raw_name, prepared_index, ending_map, suffixes, log
-        )
-        all_results.extend(candidate_results)
+    # Treff uten felles forbokstav kan bare nå _MIN_RESULT_SCORE med koordinatbonus
+    full_scan_fallback = coord is not None
+
+    # Med rapidfuzz slipper avstandsberegningen GIL-en, så delnavnene kan
+    # scores parallelt. I debugmodus beholdes rekkefølgen i loggen.
+    if not debug and _rapidfuzz_levenshtein is not None and len(raw_names) > 1:
+        for candidate_results in _score_executor().map(
+            lambda raw_name: _score_single_name(
+                raw_name,
+                prepared_index,
+                ending_map,
+                suffixes,
+                full_scan_fallback=full_scan_fallback,
+            ),
+            raw_names,
+        ):
+            all_results.extend(candidate_results)
+    else:
+        for raw_name in raw_names:
+            log(f"Behandler vassdragsnavn: {raw_name!r}")
+            candidate_results = _score_single_name(
+                raw_name,
+                prepared_index,
+                ending_map,
+                suffixes,
+                log if debug else None,
+                full_scan_fallback=full_scan_fallback,
+            )
+            all_results.extend(candidate_results)
 
     if coord is not None:
-        _apply_coordinate_bonus(all_results, coord, log if debug else None)
+        _apply_coordinate_bonus(
+            all_results, coord, log if debug else None, prepared_index=prepared_index
+        )
 
-    filtered_results = [result for result in all_results if result.score >= 30]
+    filtered_results = [
+        result for result in all_results if result.score >= _MIN_RESULT_SCORE
+    ]
 
     # Sorter globalt på score (synkende) og vassdragsnummer som sekundær nøkkel
     filtered_results.sort(key=lambda item: (-item.score, item.entry.get("vassdragsnr")))
-    return [result.as_dict() for result in filtered_results]
+    results = [result.as_dict() for result in filtered_results]
+    if not debug:
+        resolve_cache[cache_key] = results
+        if len(resolve_cache) > _RESOLVE_CACHE_SIZE:
+            try:
+                resolve_cache.popitem(last=False)
+            except KeyError:  # tømt av en annen tråd i mellomtiden
+                pass
+        return [dict(item) for item in results]
+    return results
+
+
+def clear_resolve_cache() -> None:
+    """Tøm resultatcachen til :func:`resolve_vassdrag` (f.eks. i langvarige tjenester)."""
+
+    if _PREPARED_INDEX_CACHE is not None:
+        _PREPARED_INDEX_CACHE[3].resolve_cache.clear()
+    for prepared in list(_PREPARED_INDEX_BY_CONTENT.values()):
+        prepared.resolve_cache.clear()
+
+
+def _score_executor() -> ThreadPoolExecutor:
+    """Trådpool for delnavn i :func:`resolve_vassdrag` (opprettes ved første bruk)."""
+
+    global _SCORE_EXECUTOR
+    if _SCORE_EXECUTOR is None:
+        _SCORE_EXECUTOR = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+    return _SCORE_EXECUTOR
 
 
 def split_vassdrag_names(text: str, *, suffixes: Sequence[str]) -> list[str]:
     """Del opp ``text`` i separate vassdragsnavn."""
 
-    normalized = re.sub(r"\s+(?:og|&|\+/)\s+", ",", text, flags=re.IGNORECASE)
+    normalized = _CONJUNCTION_RE.sub(",", text)
     normalized = normalized.replace("/", ",")
     parts = [part.strip(" ,") for part in normalized.split(",")]
     parts = [part for part in parts if part]
@@ -219,23 +469,15 @@ def _expand_hyphenated(name: str, *, suffixes: Sequence[str]) -> list[str]:
             last_suffix = pieces[-1]
             suffix_only = True
         else:
-            expanded_basic: list[str] = []
-            seen_basic: set[str] = set()
-            for piece in pieces:
-                if piece not in seen_basic:
-                    seen_basic.add(piece)
-                    expanded_basic.append(piece)
-            return expanded_basic
-
-    expanded = []
-    seen: set[str] = set()
+            return list(dict.fromkeys(pieces))
+
+    # Ordnet mengde: dict beholder innsettingsrekkefølgen
+    expanded: dict[str, None] = {}
     for idx, piece in enumerate(pieces):
         stem, suffix = _split_suffix(piece, suffixes)
         piece_lower = piece.lower()
         if suffix:
-            if piece not in seen:
-                seen.add(piece)
-                expanded.append(piece)
+            expanded[piece] = None
             continue
 
         if (
@@ -246,20 +488,49 @@ def _expand_hyphenated(name: str, *, suffixes: Sequence[str]) -> list[str]:
             continue
 
         base = stem or piece
-        combined = _join_stem_suffix(base, last_suffix)
-        if combined not in seen:
-            seen.add(combined)
-            expanded.append(combined)
+        expanded[_join_stem_suffix(base, last_suffix)] = None
 
-    return expanded
+    return list(expanded)
 
 
-def _collect_suffixes(ending_map: dict[str, str]) -> list[str]:
-    """Lag en sortert liste over kjente haler for effektiv matching."""
+def _collect_suffixes(ending_map: dict[str, str]) -> tuple[str, ...]:
+    """Lag en sortert tuple over kjente haler for effektiv matching.
+
+    Resultatet gjenbrukes så lenge samme ``ending_map``-objekt sendes inn, slik
+    at cachene nøklet på halene treffer på tvers av kall.
+    """
+
+    global _SUFFIXES_CACHE
+    cached = _SUFFIXES_CACHE
+    if cached is not None and cached[0] is ending_map:
+        return cached[1]
 
     extra_suffixes = ["vassdraget", "vassdrag", "vassdragene", "vassdragets"]
     suffixes = set(ending_map.keys()) | {s.lower() for s in extra_suffixes}
-    return sorted(suffixes, key=len, reverse=True)
+    result = tuple(sorted(suffixes, key=len, reverse=True))
+    _SUFFIXES_CACHE = (ending_map, result)
+    return result
+
+
+def _suffix_table(ending_map: dict[str, str], suffixes: Sequence[str]) -> _SuffixTable:
+    """Hent (eller lag) en :class:`_SuffixTable` for ``ending_map`` og ``suffixes``."""
+
+    global _SUFFIX_TABLE_CACHE
+    suffix_tuple = tuple(suffixes)
+    table = _SUFFIX_TABLE_CACHE
+    if (
+        table is None
+        or table.ending_map is not ending_map
+        or table.suffixes is not suffix_tuple
+    ):
+        categories: dict[str, str] = {}
+        for suffix in suffix_tuple:
+            mapped = ending_map.get(suffix.lower())
+            if mapped:
+                categories[suffix.lower()] = _CATEGORY_COLLAPSE.get(mapped, mapped)
+        table = _SuffixTable(ending_map, suffix_tuple, categories)
+        _SUFFIX_TABLE_CACHE = table
+    return table
 
 
 def _get_prepared_index(
@@ -271,15 +542,148 @@ def _get_prepared_index(
 
     global _PREPARED_INDEX_CACHE
     suffix_key = tuple(suffixes)
-    cache_key = (id(regine_index), id(ending_map), suffix_key)
-    if _PREPARED_INDEX_CACHE and _PREPARED_INDEX_CACHE[0] == cache_key:
-        return _PREPARED_INDEX_CACHE[1]
-
-    prepared = _build_prepared_index(regine_index, ending_map, suffixes)
-    _PREPARED_INDEX_CACHE = (cache_key, prepared)
+    cached = _PREPARED_INDEX_CACHE
+    if (
+        cached is not None
+        and cached[0] is regine_index
+        and cached[1] is ending_map
+        and cached[2] == suffix_key
+    ):
+        return cached[3]
+
+    loaded = _LOADED_REGINE_INDEX
+    if loaded is not None and loaded[0] is regine_index:
+        # Lest fra fil: fil og mtime identifiserer innholdet, ingen hashing av
+        # hele indeksen, og PreparedIndex lagres ved siden av JSON-filen
+        _entries, path, file_key = loaded
+        disk_key = (
+            _PICKLE_CACHE_VERSION,
+            *file_key,
+            _suffix_settings_key(ending_map, suffix_key),
+        )
+        cache_key: object = (str(path), disk_key)
+        cache_path = path.with_name(path.stem + ".prepared.cache.pkl")
+    else:
+        cache_key = _prepared_index_content_key(regine_index, ending_map, suffix_key)
+        cache_path = None
+        disk_key = ()
+    prepared = _PREPARED_INDEX_BY_CONTENT.get(cache_key)
+    if prepared is None:
+        if cache_path is not None:
+            prepared = _read_prepared_cache(cache_path, disk_key, regine_index)
+        if prepared is None:
+            prepared = _build_prepared_index(regine_index, ending_map, suffixes)
+            if cache_path is not None:
+                _write_prepared_cache(cache_path, disk_key, prepared)
+        _PREPARED_INDEX_BY_CONTENT[cache_key] = prepared
+    _PREPARED_INDEX_CACHE = (regine_index, ending_map, suffix_key, prepared)
     return prepared
 
 
+def _prepared_index_content_key(
+    regine_index: Sequence[dict],
+    ending_map: dict[str, str],
+    suffixes: tuple[str, ...],
+) -> bytes:
+    """Hash av alt :func:`_build_prepared_index` leser, for indekser laget i minnet."""
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(_suffix_settings_key(ending_map, suffixes))
+    for entry in regine_index:
+        hasher.update(
+            repr(
+                (
+                    entry.get("vassdragsnr"),
+                    entry.get("navn"),
+                    entry.get("navn_normalisert"),
+                    entry.get("lat"),
+                    entry.get("long"),
+                )
+            ).encode("utf-8")
+        )
+    return hasher.digest()
+
+
+def _suffix_settings_key(ending_map: dict[str, str], suffixes: tuple[str, ...]) -> bytes:
+    """Hash av ``ending_map`` og ``suffixes``, som også påvirker byggingen."""
+
+    # Halene sorteres fordi rekkefølgen ved lik lengde følger set-iterasjonen,
+    # som varierer mellom prosesser; nøkkelen må være stabil for pickle-cachen
+    return hashlib.blake2b(
+        repr((sorted(ending_map.items()), sorted(suffixes))).encode("utf-8"),
+        digest_size=16,
+    ).digest()
+
+
+# Feltene som lagres i pickle-cachen; oppføringene har kalleren allerede, og
+# resolve-cachen skal starte tom
+_PICKLED_FIELDS = tuple(
+    f.name for f in fields(PreparedIndex) if f.name not in ("entries", "resolve_cache")
+)
+
+
+def _read_pickle_cache(cache_path: Path, key: object):
+    """Les data fra en pickle-cache, eller None hvis den mangler eller er utdatert.
+
+    Nøkkelen ligger først i filen, så en utdatert cache forkastes uten at
+    resten pakkes ut.
+    """
+
+    if not cache_path.exists():
+        return None
+    try:
+        with cache_path.open("rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buffer:
+            # To separate load-kall: hver pickle har sin egen memo-tabell
+            if pickle.load(buffer) != key:
+                return None
+            return pickle.load(buffer)
+    except Exception:
+        # Korrupt eller ukjent cache - bygg på nytt
+        return None
+
+
+def _write_pickle_cache(cache_path: Path, key: object, data: object) -> None:
+    """Skriv ``key`` og ``data`` til en pickle-cache. Feil ignoreres (f.eks. skrivebeskyttet mappe)."""
+
+    # Eget navn per prosess, så samtidige skrivere ikke avkorter hverandres fil
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(cache_path)
+    except OSError:
+        pass
+
+
+def _read_prepared_cache(
+    cache_path: Path, key: tuple, regine_index: Sequence[dict]
+) -> PreparedIndex | None:
+    """Les en tidligere bygget :class:`PreparedIndex` fra pickle-cachen.
+
+    Nøkkelen er formatversjon, JSON-filens mtime og størrelse og hash av
+    halene, så en cache for en endret indeks forkastes.
+    """
+
+    values = _read_pickle_cache(cache_path, key)
+    if values is None:
+        return None
+    try:
+        return PreparedIndex(regine_index, *values)
+    except TypeError:
+        return None
+
+
+def _write_prepared_cache(cache_path: Path, key: tuple, prepared: PreparedIndex) -> None:
+    """Skriv ``prepared`` til pickle-cachen."""
+
+    # Lagres som vanlige tupler/dicts så cachen ikke avhenger av modulnavnet
+    values = tuple(getattr(prepared, name) for name in _PICKLED_FIELDS)
+    _write_pickle_cache(cache_path, key, values)
+
+
 def _build_prepared_index(
     regine_index: Sequence[dict],
     ending_map: dict[str, str],
@@ -288,12 +692,27 @@ def _build_prepared_index(
     navn_lookup: defaultdict[str, list[int]] = defaultdict(list)
     navn_normalized_lookup: defaultdict[str, list[int]] = defaultdict(list)
     first_letter_lookup: defaultdict[str, list[int]] = defaultdict(list)
-    prepared_entries: list[PreparedEntry] = []
+    phonetic_bktrees: dict[str, list] = {}
+    navns: list[str | None] = []
+    navn_casefolds: list[str] = []
+    navn_cleans: list[str] = []
+    navn_signatures: list[str] = []
+    stem_signatures: list[str] = []
+    stem_cleans: list[str] = []
+    normalized_names: list[str] = []
+    categories: list[str | None] = []
+    stems: list[str] = []
+    first_letters: list[str] = []
+    lon_rads: list[float] = []
+    lat_rads: list[float] = []
+    cos_lats: list[float] = []
+    vassdragsnrs: list[object] = []
+    vassdragsnr_penalties: list[int] = []
 
     for idx, entry in enumerate(regine_index):
         navn = entry.get("navn")
         navn_str = navn if isinstance(navn, str) else ""
-        navn_lower = navn_str.casefold() if navn_str else ""
+        navn_lower = sys.intern(navn_str.casefold()) if navn_str else ""
         if navn_lower:
             navn_lookup[navn_lower].append(idx)
 
@@ -311,24 +730,34 @@ def _build_prepared_index(
         stem_clean = _clean_letters(stem)
         navn_signature = _phonetic_signature(navn_str) if navn_str else ""
         stem_signature = _phonetic_signature(stem) if stem else navn_signature
-        first_letter = _clean_letters(navn_str)[:1]
+        navn_clean = _clean_letters(navn_str)
+        first_letter = navn_clean[:1]
         if not first_letter and stem_clean:
             first_letter = stem_clean[:1]
+        lon_rad, lat_rad, cos_lat = _coordinate_terms(entry.get("long"), entry.get("lat"))
         if first_letter:
             first_letter_lookup[first_letter].append(idx)
-
-        prepared_entries.append(
-            PreparedEntry(
-                entry=entry,
-                navn=navn_str or None,
-                navn_signature=navn_signature,
-                stem_signature=stem_signature,
-                stem_clean=stem_clean,
-                normalized_name=normalized_name,
-                category=category,
-                stem=stem,
-                first_letter=first_letter,
-            )
+            for signature in (navn_signature, stem_signature):
+                if signature:
+                    _bktree_insert(phonetic_bktrees, first_letter, signature, idx)
+
+        navns.append(navn_str or None)
+        navn_casefolds.append(navn_lower)
+        navn_cleans.append(navn_clean)
+        navn_signatures.append(navn_signature)
+        stem_signatures.append(stem_signature)
+        stem_cleans.append(stem_clean)
+        normalized_names.append(normalized_name)
+        categories.append(category)
+        stems.append(stem)
+        first_letters.append(first_letter)
+        lon_rads.append(lon_rad)
+        lat_rads.append(lat_rad)
+        cos_lats.append(cos_lat)
+        vnr = entry.get("vassdragsnr")
+        vassdragsnrs.append(vnr)
+        vassdragsnr_penalties.append(
+            max(0, len(vnr) - 3) * 5 if isinstance(vnr, str) and vnr else 0
         )
 
     navn_lookup_final = {key: tuple(indices) for key, indices in navn_lookup.items()}
@@ -338,29 +767,123 @@ def _build_prepared_index(
     first_letter_lookup_final = {
         key: tuple(indices) for key, indices in first_letter_lookup.items()
     }
-    all_indices = tuple(range(len(prepared_entries)))
-
+    # Sorterte nøkler for prefikssjekk med bisect (se _any_key_with_prefix)
+    navn_sorted = tuple(sorted(navn_lookup_final))
+    navn_normalized_sorted = tuple(sorted(navn_normalized_lookup_final))
+    swap_lookup = _build_swap_lookup(navn_normalized_lookup_final)
+    merged_lookup: dict[tuple[int, str], tuple] = {}
+    for kind, lookup in (
+        (_LOOKUP_NAVN, navn_lookup_final),
+        (_LOOKUP_NORMALIZED, navn_normalized_lookup_final),
+        (_LOOKUP_SWAP, swap_lookup),
+    ):
+        for key, values in lookup.items():
+            merged_lookup[(kind, key)] = values
     return PreparedIndex(
         entries=regine_index,
-        prepared_entries=prepared_entries,
-        navn_lookup=navn_lookup_final,
-        navn_normalized_lookup=navn_normalized_lookup_final,
+        navns=tuple(navns),
+        navn_casefolds=tuple(navn_casefolds),
+        navn_cleans=tuple(navn_cleans),
+        navn_signatures=tuple(navn_signatures),
+        stem_signatures=tuple(stem_signatures),
+        navn_signature_codes=tuple(map(_signature_code, navn_signatures)),
+        stem_signature_codes=tuple(map(_signature_code, stem_signatures)),
+        stem_cleans=tuple(stem_cleans),
+        normalized_names=tuple(normalized_names),
+        categories=tuple(categories),
+        stems=tuple(stems),
+        first_letters=tuple(first_letters),
+        lon_rads=tuple(lon_rads),
+        lat_rads=tuple(lat_rads),
+        cos_lats=tuple(cos_lats),
+        vassdragsnrs=tuple(vassdragsnrs),
+        vassdragsnr_keys=tuple(map(str, vassdragsnrs)),
+        vassdragsnr_penalties=tuple(vassdragsnr_penalties),
+        merged_lookup=merged_lookup,
+        navn_sorted=navn_sorted,
+        navn_normalized_sorted=navn_normalized_sorted,
         first_letter_lookup=first_letter_lookup_final,
-        all_indices=all_indices,
+        phonetic_bktrees=phonetic_bktrees,
     )
 
 
+def _build_swap_lookup(
+    navn_normalized_lookup: dict[str, tuple[int, ...]],
+) -> dict[str, tuple[tuple[str, int], ...]]:
+    """Lag oppslag fra «prefiks + kategori» til oppføringer med byttet hale.
+
+    En oppføring med normalisert navn «GlommaVANN» registreres under
+    «glommaelv» og «glommafjord», slik at et kandidatnavn som slutter på ELV
+    finner hale-bytte-treffene med ett oppslag. Verdiene er (hale, indeks) i
+    samme rekkefølge som :func:`_swap_normalized_tail` ville gitt.
+    """
+
+    swap_lookup: defaultdict[str, list[tuple[int, int, str]]] = defaultdict(list)
+    for key, indices in navn_normalized_lookup.items():
+        for tail in _SWAP_TAILS:
+            tail_lower = tail.casefold()
+            if not key.endswith(tail_lower):
+                continue
+            prefix = key[: len(key) - len(tail_lower)]
+            for category, replacements in _SWAP_TAILS.items():
+                if tail in replacements:
+                    order = replacements.index(tail)
+                    swap_lookup[prefix + category.casefold()].extend(
+                        (order, idx, tail) for idx in indices
+                    )
+
+    return {
+        key: tuple((tail, idx) for _order, idx, tail in sorted(items))
+        for key, items in swap_lookup.items()
+    }
+
+
 def _split_suffix(word: str, suffixes: Sequence[str]) -> tuple[str, str]:
     """Del ``word`` i (stamme, hale) hvis halen er kjent."""
 
+    return _split_suffix_cached(word, tuple(suffixes))
+
+
+@lru_cache(maxsize=4096)
+def _split_suffix_cached(word: str, suffixes: tuple[str, ...]) -> tuple[str, str]:
     lowered = word.lower()
-    for suffix in suffixes:
-        if lowered.endswith(suffix) and len(lowered) > len(suffix):
-            cut = len(word) - len(suffix)
-            return word[:cut], word[cut:]
+    node = _suffix_trie(suffixes)
+    longest = 0
+    # Gå baklengs gjennom ordet; lengste hale som er kortere enn ordet vinner
+    for depth, char in enumerate(reversed(lowered), 1):
+        node = node.get(char)
+        if node is None:
+            break
+        if "" in node and depth < len(lowered):
+            longest = depth
+    if longest:
+        cut = len(word) - longest
+        return word[:cut], word[cut:]
     return word, ""
 
 
+def _suffix_trie(suffixes: tuple[str, ...]) -> dict:
+    """Bygg (eller hent) et trie over de reverserte halene.
+
+    Hver node er et dict fra tegn til barnenode; nøkkelen ``""`` markerer at
+    en hale slutter i noden.
+    """
+
+    global _SUFFIX_TRIE_CACHE
+    cached = _SUFFIX_TRIE_CACHE
+    if cached is not None and (cached[0] is suffixes or cached[0] == suffixes):
+        return cached[1]
+
+    root: dict = {}
+    for suffix in suffixes:
+        node = root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node[""] = True
+    _SUFFIX_TRIE_CACHE = (suffixes, root)
+    return root
+
+
 def _join_stem_suffix(stem: str, suffix: str) -> str:
     """Kombiner en stamme og en hale uten å introdusere ekstra mellomrom."""
 
@@ -374,6 +897,92 @@ def _join_stem_suffix(stem: str, suffix: str) -> str:
     return f"{stem}{suffix}" if not stem.endswith(" ") else f"{stem}{suffix}"
 
 
+_DIRECTION_WORDS = frozenset(
+    {
+        "østre",
+        "vestre",
+        "nordre",
+        "søndre",
+        "sødre",
+        "øvre",
+        "nedre",
+    }
+)
+
+
+def _replace_aa(match: re.Match[str]) -> str:
+    seq = match.group(0)
+    if seq.isupper() or seq[0].isupper():
+        return "Å"
+    return "å"
+
+
+def _add_candidate(candidate: str, candidates: dict[str, None]) -> None:
+    """Legg til ``candidate`` (og æ-/aa-varianter) hvis den ikke er sett før.
+
+    ``candidates`` brukes som ordnet mengde: nøklene i innsettingsrekkefølge.
+    """
+
+    candidate = candidate.strip()
+    if candidate and candidate not in candidates:
+        candidates[candidate] = None
+        if "æ" in candidate:
+            candidates.setdefault(candidate.replace("æ", "e").replace("Æ", "E"))
+        if "aa" in candidate.lower():
+            candidates.setdefault(_AA_RE.sub(_replace_aa, candidate))
+
+
+def _s_variants(base: str) -> list[str]:
+    """Returner ``base`` og varianten med/uten avsluttende «s»."""
+
+    base = base.strip()
+    if not base:
+        return []
+
+    variants: list[str] = [base]
+    if base[-1].lower() == "s":
+        alt = base[:-1].rstrip()
+        if alt:
+            variants.append(alt)
+    else:
+        variants.append(f"{base}s")
+
+    unique: list[str] = []
+    for item in variants:
+        if item and item not in unique:
+            unique.append(item)
+    return unique
+
+
+def _add_s_variants(
+    base: str,
+    candidates: dict[str, None],
+    *,
+    include_original: bool = True,
+) -> None:
+    variants = _s_variants(base)
+    if not variants:
+        return
+    start_index = 0 if include_original else 1
+    for variant in variants[start_index:]:
+        _add_candidate(variant, candidates)
+
+
+def _strip_direction_words(text_value: str) -> str:
+    words = text_value.split()
+    if len(words) <= 1:
+        return text_value
+    filtered = [w for w in words if w.casefold() not in _DIRECTION_WORDS]
+    return " ".join(filtered)
+
+
+def _add_directionless(base: str, candidates: dict[str, None]) -> None:
+    stripped = _strip_direction_words(base)
+    if stripped and stripped != base:
+        _add_candidate(stripped, candidates)
+        _add_s_variants(stripped, candidates, include_original=False)
+
+
 def _generate_original_candidates(
     name: str,
     suffixes: Sequence[str],
@@ -385,132 +994,60 @@ def _generate_original_candidates(
     if not trimmed:
         return []
 
-    candidates: list[str] = []
-    seen: set[str] = set()
-
-    def _add(candidate: str) -> None:
-        candidate = candidate.strip()
-        if candidate and candidate not in seen:
-            seen.add(candidate)
-            candidates.append(candidate)
-            if "æ" in candidate:
-                ae_variant = candidate.replace("æ", "e").replace("Æ", "E")
-                if ae_variant not in seen:
-                    seen.add(ae_variant)
-                    candidates.append(ae_variant)
-            if "aa" in candidate.lower():
-                def _replace_aa(match: re.Match[str]) -> str:
-                    seq = match.group(0)
-                    if seq.isupper() or seq[0].isupper():
-                        return "Å"
-                    return "å"
-
-                aa_variant = re.sub("aa", _replace_aa, candidate, flags=re.IGNORECASE)
-                if aa_variant not in seen:
-                    seen.add(aa_variant)
-                    candidates.append(aa_variant)
-
-    def _iter_s_variants(base: str) -> list[str]:
-        base = base.strip()
-        if not base:
-            return []
-
-        variants: list[str] = [base]
-        if base[-1].lower() == "s":
-            alt = base[:-1].rstrip()
-            if alt:
-                variants.append(alt)
-        else:
-            variants.append(f"{base}s")
-
-        unique: list[str] = []
-        for item in variants:
-            if item and item not in unique:
-                unique.append(item)
-        return unique
-
-    def _add_s_variants(base: str, *, include_original: bool = True) -> None:
-        variants = _iter_s_variants(base)
-        if not variants:
-            return
-        start_index = 0 if include_original else 1
-        for variant in variants[start_index:]:
-            _add(variant)
-
-    direction_words = {
-        "østre",
-        "vestre",
-        "nordre",
-        "søndre",
-        "sødre",
-        "øvre",
-        "nedre",
-    }
+    # Ordnet mengde: dict beholder innsettingsrekkefølgen
+    candidates: dict[str, None] = {}
 
-    def _strip_direction_words(text_value: str) -> str:
-        words = text_value.split()
-        if len(words) <= 1:
-            return text_value
-        filtered = [w for w in words if w.casefold() not in direction_words]
-        return " ".join(filtered)
-
-    def _add_directionless(base: str) -> None:
-        stripped = _strip_direction_words(base)
-        if stripped and stripped != base:
-            _add(stripped)
-            _add_s_variants(stripped, include_original=False)
-
-    _add(trimmed)
-    _add_directionless(trimmed)
+    _add_candidate(trimmed, candidates)
+    _add_directionless(trimmed, candidates)
 
     stem, suffix = _split_suffix(trimmed, suffixes)
     if stem and stem != trimmed:
-        _add_s_variants(stem)
-        _add_directionless(stem)
+        _add_s_variants(stem, candidates)
+        _add_directionless(stem, candidates)
     elif not suffix:
-        _add_s_variants(trimmed, include_original=False)
+        _add_s_variants(trimmed, candidates, include_original=False)
         # Retning fjernes allerede fra trimmed
 
     if suffix:
         mapped = ending_map.get(suffix.lower())
         if mapped == "DAL":
             dal_variant = _join_stem_suffix(stem or trimmed, "dal")
-            _add(dal_variant)
-            _add_s_variants(dal_variant, include_original=False)
-            _add_directionless(dal_variant)
+            _add_candidate(dal_variant, candidates)
+            _add_s_variants(dal_variant, candidates, include_original=False)
+            _add_directionless(dal_variant, candidates)
             elv_variant = _join_stem_suffix(dal_variant, "selva")
-            _add(elv_variant)
-            _add_s_variants(elv_variant, include_original=False)
-            _add_directionless(elv_variant)
+            _add_candidate(elv_variant, candidates)
+            _add_s_variants(elv_variant, candidates, include_original=False)
+            _add_directionless(elv_variant, candidates)
 
     # Håndter «reguleringen» → «vassdraget»
     if trimmed.lower().endswith("reguleringen"):
-        repl = re.sub(r"reguleringen$", "vassdraget", trimmed, flags=re.IGNORECASE)
-        _add(repl)
-        _add_s_variants(repl, include_original=False)
+        repl = _REGULERINGEN_RE.sub("vassdraget", trimmed)
+        _add_candidate(repl, candidates)
+        _add_s_variants(repl, candidates, include_original=False)
 
     # «Glomma» -> «Glommavassdraget», «Suldal» -> «Suldalsvassdraget»
     base = stem or trimmed
     base_clean = base.rstrip()
     if base_clean and not base_clean.lower().endswith("reguleringen"):
-        for variant in _iter_s_variants(base_clean):
-            _add(_join_stem_suffix(variant, "vassdraget"))
+        for variant in _s_variants(base_clean):
+            _add_candidate(_join_stem_suffix(variant, "vassdraget"), candidates)
         stripped_base = _strip_direction_words(base_clean)
         if stripped_base and stripped_base != base_clean:
-            for variant in _iter_s_variants(stripped_base):
-                _add(_join_stem_suffix(variant, "vassdraget"))
+            for variant in _s_variants(stripped_base):
+                _add_candidate(_join_stem_suffix(variant, "vassdraget"), candidates)
 
     # Legg til siste ord (og variant med vassdraget) for sammensatte navn
     if " " in trimmed:
         last_word = trimmed.split()[-1]
         last_lower = last_word.lower()
-        _add(last_word)
+        _add_candidate(last_word, candidates)
         if last_lower != "reguleringen" and not last_lower.endswith("vassdraget"):
-            _add_s_variants(last_word, include_original=False)
-            for variant in _iter_s_variants(last_word):
-                _add(_join_stem_suffix(variant, "vassdraget"))
+            _add_s_variants(last_word, candidates, include_original=False)
+            for variant in _s_variants(last_word):
+                _add_candidate(_join_stem_suffix(variant, "vassdraget"), candidates)
 
-    return candidates
+    return list(candidates)
 
 
 def _normalize_name(
@@ -520,30 +1057,23 @@ def _normalize_name(
 ) -> tuple[str, str | None, str]:
     """Returner (normalisert navn, kategori, stamme)."""
 
+    return _normalize_name_cached(name, _suffix_table(ending_map, suffixes))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_name_cached(
+    name: str, table: _SuffixTable
+) -> tuple[str, str | None, str]:
     if not name:
         return "", None, ""
 
-    collapse = {
-        "ELV": "ELV",
-        "ELV_SAMISK": "ELV",
-        "VANN": "VANN",
-        "VANN_SAMISK": "VANN",
-        "FJORD": "FJORD",
-        "DAL": "DAL",
-        "FJELL": "FJELL",
-    }
-
-    words = name.split()
+    categories = table.categories
     normalized_words: list[str] = []
     last_category: str | None = None
 
-    for word in words:
-        stem, suffix = _split_suffix(word, suffixes)
-        category = None
-        if suffix:
-            mapped = ending_map.get(suffix.lower())
-            if mapped:
-                category = collapse.get(mapped, mapped)
+    for word in name.split():
+        stem, suffix = _split_suffix_cached(word, table.suffixes)
+        category = categories.get(suffix.lower()) if suffix else None
         if category:
             normalized_words.append(f"{stem}{category}")
             last_category = category
@@ -554,7 +1084,7 @@ def _normalize_name(
 
     # Finn stamme (uten siste kategori-ord)
     stem_normalized = normalized
-    match = re.search(r"(.*?)(ELV|VANN|FJORD|DAL|FJELL)(?:\b|$)", normalized)
+    match = _CATEGORY_TAIL_RE.search(normalized)
     if match:
         stem_normalized = match.group(1).strip()
 
@@ -562,15 +1092,16 @@ def _normalize_name(
 
 
 def _generate_normalized_candidates(
-    candidates: Iterable[str],
-    ending_map: dict[str, str],
-    suffixes: Sequence[str],
+    normalizations: Iterable[tuple[str, str | None, str]],
 ) -> dict[str, tuple[str | None, str]]:
-    """Lag mapping fra normalisert navn til (kategori, stamme)."""
+    """Lag mapping fra normalisert navn til (kategori, stamme).
+
+    ``normalizations`` er resultatene av :func:`_normalize_name` for hver
+    kandidat, så normaliseringen ikke gjøres to ganger.
+    """
 
     normalized: dict[str, tuple[str | None, str]] = {}
-    for candidate in candidates:
-        normalized_name, category, stem = _normalize_name(candidate, ending_map, suffixes)
+    for normalized_name, category, stem in normalizations:
         if normalized_name:
             normalized[normalized_name] = (category, stem)
     return normalized
@@ -582,14 +1113,31 @@ def _score_single_name(
     ending_map: dict[str, str],
     suffixes: Sequence[str],
     debug_log: Callable[[str], None] | None = None,
+    *,
+    full_scan_fallback: bool = False,
 ) -> list[MatchResult]:
-    """Beregn matches for ett vassdragsnavn."""
+    """Beregn matches for ett vassdragsnavn.
+
+    ``full_scan_fallback`` sendes videre til :func:`_phonetic_matches` og
+    settes når søket har coord=.
+    """
 
     candidates = _generate_original_candidates(name, suffixes, ending_map)
     if debug_log:
         debug_log(f"  Originale kandidater: {candidates}")
+
+    # Beregn bokstavfilter, fonetisk signatur og normalisering én gang per
+    # kandidat; alle stegene under leser herfra
+    candidate_info = {
+        candidate: (
+            _clean_letters(candidate),
+            _phonetic_signature(candidate),
+            _normalize_name(candidate, ending_map, suffixes),
+        )
+        for candidate in candidates
+    }
     normalized_candidates = _generate_normalized_candidates(
-        candidates, ending_map, suffixes
+        normalized for _clean, _signature, normalized in candidate_info.values()
     )
     if debug_log:
         debug_log(
@@ -602,18 +1150,17 @@ def _score_single_name(
 
     best_per_vassdrag: dict[str, MatchResult] = {}
     input_clean = _clean_letters(name)
-
-    def register(entry: dict, score: int, candidate: str, match_type: str) -> None:
-        key = str(entry.get("vassdragsnr"))
-        adjusted_score = score
-        vnr = entry.get("vassdragsnr")
-        if isinstance(vnr, str) and vnr:
-            penalty = max(0, len(vnr) - 3) * 5
-            adjusted_score -= penalty
-        else:
-            penalty = 0
+    vassdragsnr_keys = prepared_index.vassdragsnr_keys
+    vassdragsnr_penalties = prepared_index.vassdragsnr_penalties
+
+    def register(idx: int, score: int, candidate: str, match_type: str) -> None:
+        entry = prepared_index.entries[idx]
+        key = vassdragsnr_keys[idx]
+        penalty = vassdragsnr_penalties[idx]
+        adjusted_score = score - penalty
         length_penalty = 0
-        candidate_clean = _clean_letters(candidate)
+        info = candidate_info.get(candidate)
+        candidate_clean = info[0] if info is not None else _clean_letters(candidate)
         if input_clean and candidate_clean:
             diff = len(input_clean) - len(candidate_clean)
             if diff >= 3:
@@ -626,7 +1173,7 @@ def _score_single_name(
         if debug_log:
             message = (
                 f"  -> {match_type} treff for kandidat {candidate!r} ga {score} poeng"
-                f" mot {entry.get('navn')} (vnr {vnr})"
+                f" mot {entry.get('navn')} (vnr {prepared_index.vassdragsnrs[idx]})"
             )
             extras: list[str] = []
             if penalty:
@@ -644,6 +1191,7 @@ def _score_single_name(
             entry,
             coord_bonus=0,
             base_score=adjusted_score,
+            entry_index=idx,
         )
         current = best_per_vassdrag.get(key)
         if current is None or adjusted_score > current.score:
@@ -654,39 +1202,90 @@ def _score_single_name(
             if debug_log and message:
                 debug_log(message + f" [forkastet, eksisterende score {current.score}]")
 
-    # Steg 4 – eksakt match på «navn»
-    for candidate in candidates:
-        for entry in _lookup_exact(prepared_index, "navn", candidate):
-            if debug_log:
-                debug_log(f"  Søker eksakt i 'navn' med kandidat {candidate!r}")
-            register(entry, 100, candidate, "navn")
+    # Steg 4 og 5 – eksakte oppslag i «navn», «navn_normalisert» og med byttet
+    # hale, samlet i én liste av (nøkkeltype, verdi, poeng, match_type, kilde)
+    # i samme rekkefølge som stegene ellers ville kjørt.
+    probes: list[tuple[int, str, int, str, str | None]] = []
+
+    # Alle kandidater deler som regel stamme; finnes ingen nøkkel med felles
+    # prefiks, kan ingen av dem gi eksakt treff.
+    if _any_key_with_prefix(prepared_index.navn_sorted, candidates):
+        probes.extend(
+            (_LOOKUP_NAVN, candidate, 100, "navn", None) for candidate in candidates
+        )
 
-    # Steg 5 – normaliserte matcher
+    normalized_possible = _any_key_with_prefix(
+        prepared_index.navn_normalized_sorted, normalized_candidates
+    )
     for normalized_name, (category, _stem) in normalized_candidates.items():
-        for entry in _lookup_exact(prepared_index, "navn_normalisert", normalized_name):
-            if debug_log:
-                debug_log(
-                    f"  Søker eksakt i 'navn_normalisert' med {normalized_name!r}"
+        if normalized_possible:
+            probes.append(
+                (_LOOKUP_NORMALIZED, normalized_name, 90, "navn_normalisert", None)
+            )
+        if category not in _SWAP_TAILS:
+            continue
+        # Prøv hale-bytte (ELV <-> VANN/FJORD). Står kategorien bare som hale,
+        # gir det forhåndsberegnede swap-oppslaget svaret; ellers bygges de
+        # alternative navnene med regex og slås opp som normaliserte navn.
+        tail_start = len(normalized_name) - len(category)
+        if (
+            normalized_name.endswith(category)
+            and normalized_name.find(category) == tail_start
+        ):
+            probes.append(
+                (
+                    _LOOKUP_SWAP,
+                    normalized_name,
+                    60,
+                    "navn_normalisert_hale",
+                    normalized_name[:tail_start],
                 )
-            register(entry, 90, normalized_name, "navn_normalisert")
+            )
+        else:
+            probes.extend(
+                (_LOOKUP_NORMALIZED, alt_name, 60, "navn_normalisert_hale", normalized_name)
+                for alt_name in _swap_normalized_tail(normalized_name, category)
+            )
 
-        # Prøv hale-bytte (ELV <-> VANN/FJORD)
-        alt_names = _swap_normalized_tail(normalized_name, category)
-        for alt_name in alt_names:
-            for entry in _lookup_exact(prepared_index, "navn_normalisert", alt_name):
+    merged_lookup = prepared_index.merged_lookup
+    for kind, value, score, match_type, source in probes:
+        hits = merged_lookup.get((kind, value.casefold()))
+        if not hits:
+            continue
+        if kind == _LOOKUP_SWAP:
+            # source er prefikset foran kategorien
+            for tail, idx in hits:
+                alt_name = f"{source}{tail}"
                 if debug_log:
-                    debug_log(
-                        f"  Søker med haleswap {normalized_name!r} -> {alt_name!r}"
-                    )
-                register(entry, 60, alt_name, "navn_normalisert_hale")
+                    debug_log(f"  Søker med haleswap {value!r} -> {alt_name!r}")
+                register(idx, score, alt_name, match_type)
+            continue
+        for idx in hits:
+            if debug_log:
+                if kind == _LOOKUP_NAVN:
+                    debug_log(f"  Søker eksakt i 'navn' med kandidat {value!r}")
+                elif source is None:
+                    debug_log(f"  Søker eksakt i 'navn_normalisert' med {value!r}")
+                else:
+                    debug_log(f"  Søker med haleswap {source!r} -> {value!r}")
+            register(idx, score, value, match_type)
 
     # Steg 6 – fonetisk matching på originale kandidater
     for candidate in candidates:
+        clean, signature, normalized = candidate_info[candidate]
         phonetic_matches = _phonetic_matches(
-            candidate, prepared_index, ending_map, suffixes, debug_log
+            candidate,
+            prepared_index,
+            ending_map,
+            suffixes,
+            debug_log,
+            signature=signature,
+            normalized=normalized,
+            clean=clean,
+            full_scan_fallback=full_scan_fallback,
         )
-        for entry, score_adjustment in phonetic_matches:
-            register(entry, 50 + score_adjustment, candidate, "fonetisk")
+        for idx, score_adjustment in phonetic_matches:
+            register(idx, 50 + score_adjustment, candidate, "fonetisk")
 
     return list(best_per_vassdrag.values())
 
@@ -694,30 +1293,58 @@ def _apply_coordinate_bonus(
     results: Sequence[MatchResult],
     coord: tuple[float, float],
     debug_log: Callable[[str], None] | None = None,
+    *,
+    prepared_index: PreparedIndex | None = None,
 ) -> None:
     lon_ref, lat_ref = coord
-    candidates: list[tuple[MatchResult, float]] = []
+    reference = _coordinate_terms(lon_ref, lat_ref)
+    valid: list[MatchResult] = []
+    lon_rads: list[float] = []
+    lat_rads: list[float] = []
+    cos_lats: list[float] = []
 
     for result in results:
-        lon = result.entry.get("long")
-        lat = result.entry.get("lat")
-        if not isinstance(lon, (int, float)) or not isinstance(lat, (int, float)):
+        if prepared_index is not None and result.entry_index is not None:
+            idx = result.entry_index
+            lon_rad = prepared_index.lon_rads[idx]
+            lat_rad = prepared_index.lat_rads[idx]
+            cos_lat = prepared_index.cos_lats[idx]
+        else:
+            lon_rad, lat_rad, cos_lat = _coordinate_terms(
+                result.entry.get("long"), result.entry.get("lat")
+            )
+        if isnan(lat_rad):
             continue
-        distance = _haversine_distance_km(lon_ref, lat_ref, lon, lat)
-        candidates.append((result, distance))
+        valid.append(result)
+        lon_rads.append(lon_rad)
+        lat_rads.append(lat_rad)
+        cos_lats.append(cos_lat)
 
-    if not candidates:
+    if not valid:
         if debug_log:
             debug_log("Ingen gyldige koordinater for bonusberegning.")
         return
 
-    candidates.sort(key=lambda item: item[1])
-    bonuses = [25, 20, 15, 10, 5]
-
-    for idx, (result, distance) in enumerate(candidates):
-        bonus = bonuses[idx] if idx < len(bonuses) else 0
-        if bonus <= 0:
-            break
+    if np is not None:
+        distances = _haversine_distances_km(reference, lon_rads, lat_rads, cos_lats)
+        # Bare de nærmeste får bonus. argpartition er ikke stabil og ville
+        # gitt en annen rekkefølge ved like avstander, så vi sorterer stabilt
+        # og bygger bare tuplene som faktisk brukes.
+        order = np.argsort(distances, kind="stable")[:len(_COORDINATE_BONUSES)]
+        candidates = [(valid[pos], float(distances[pos])) for pos in order]
+    else:
+        # nsmallest er stabil ved like avstander, akkurat som sort()[:n]
+        candidates = heapq.nsmallest(
+            len(_COORDINATE_BONUSES),
+            (
+                (result, _haversine_from_terms(*reference, lon_rad, lat_rad, cos_lat))
+                for result, lon_rad, lat_rad, cos_lat in zip(
+                    valid, lon_rads, lat_rads, cos_lats
+                )
+            ),
+            key=lambda item: item[1],
+        )
+    for bonus, (result, distance) in zip(_COORDINATE_BONUSES, candidates):
         result.score += bonus
         result.coord_bonus += bonus
         if debug_log:
@@ -728,60 +1355,81 @@ def _apply_coordinate_bonus(
                 f"(score {result.base_score} -> {result.score})"
             )
 
-def _lookup_exact(
-    prepared_index: PreparedIndex, field: str, value: str
-) -> Iterator[dict]:
-    if not isinstance(value, str):
-        return iter(())
-
-    value_lower = value.casefold()
-    if field == "navn":
-        mapping = prepared_index.navn_lookup
-    elif field == "navn_normalisert":
-        mapping = prepared_index.navn_normalized_lookup
-    else:
-        return iter(())
+def _any_key_with_prefix(sorted_keys: Sequence[str], values: Iterable[str]) -> bool:
+    """Sjekk om noen nøkkel starter med det felles prefikset til ``values``.
 
-    indices = mapping.get(value_lower)
-    if not indices:
-        return iter(())
+    Nøklene er casefoldet og sortert, så sjekken er ett bisect-oppslag.
+    Uten felles prefiks returneres ``True`` (ingenting kan utelukkes).
+    """
 
-    return (prepared_index.prepared_entries[idx].entry for idx in indices)
+    prefix = commonprefix([value.casefold() for value in values])
+    if not prefix:
+        return True
+    pos = bisect_left(sorted_keys, prefix)
+    return pos < len(sorted_keys) and sorted_keys[pos].startswith(prefix)
 
 
 def _swap_normalized_tail(name: str, category: str | None) -> list[str]:
-    if not category:
-        return []
-    if category not in {"ELV", "VANN", "FJORD"}:
+    pattern = _SWAP_TAIL_RES.get(category) if category else None
+    if pattern is None:
         return []
 
-    swaps = {
-        "ELV": ("VANN", "FJORD"),
-        "VANN": ("ELV", "FJORD"),
-        "FJORD": ("ELV", "VANN"),
-    }
-    pattern = re.compile(rf"(.*?){category}(\b|$)")
     match = pattern.search(name)
     if not match:
         return []
 
     prefix = match.group(1)
-    return [f"{prefix}{replacement}" for replacement in swaps[category]]
+    return [f"{prefix}{replacement}" for replacement in _SWAP_TAILS[category]]
 
 
-def _haversine_distance_km(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
-    """Beregn avstand mellom to punkter med Haversine-formelen."""
+_EARTH_RADIUS_KM = 6371.0
+# Koordinatbonus til de nærmeste treffene, i avstandsrekkefølge
+_COORDINATE_BONUSES = (25, 20, 15, 10, 5)
 
-    radius = 6371.0  # jordradius i km
-    lon1_rad, lat1_rad = radians(lon1), radians(lat1)
-    lon2_rad, lat2_rad = radians(lon2), radians(lat2)
+
+def _coordinate_terms(lon: object, lat: object) -> tuple[float, float, float]:
+    """Returner (lon_rad, lat_rad, cos(lat_rad)), eller NaN-er for ugyldige koordinater."""
+
+    if not isinstance(lon, (int, float)) or not isinstance(lat, (int, float)):
+        return nan, nan, nan
+    lat_rad = radians(lat)
+    return radians(lon), lat_rad, cos(lat_rad)
+
+
+def _haversine_from_terms(
+    lon1_rad: float,
+    lat1_rad: float,
+    cos_lat1: float,
+    lon2_rad: float,
+    lat2_rad: float,
+    cos_lat2: float,
+) -> float:
+    """Haversine med forhåndsberegnede radianer og cos(lat) (se :func:`_coordinate_terms`)."""
 
     dlon = lon2_rad - lon1_rad
     dlat = lat2_rad - lat1_rad
 
-    a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
+    a = sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2 * sin(dlon / 2) ** 2
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return radius * c
+    return _EARTH_RADIUS_KM * c
+
+
+def _haversine_distances_km(
+    reference: tuple[float, float, float],
+    lon_rads: Sequence[float],
+    lat_rads: Sequence[float],
+    cos_lats: Sequence[float],
+) -> "np.ndarray":
+    """Vektorisert :func:`_haversine_from_terms` fra ett referansepunkt (krever numpy)."""
+
+    lon1_rad, lat1_rad, cos_lat1 = reference
+    dlon = np.asarray(lon_rads, dtype=np.float64) - lon1_rad
+    dlat = np.asarray(lat_rads, dtype=np.float64) - lat1_rad
+    cos_lat2 = np.asarray(cos_lats, dtype=np.float64)
+
+    a = np.sin(dlat / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin(dlon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return _EARTH_RADIUS_KM * c
 
 
 def _phonetic_matches(
@@ -790,71 +1438,168 @@ def _phonetic_matches(
     ending_map: dict[str, str],
     suffixes: Sequence[str],
     debug_log: Callable[[str], None] | None = None,
-) -> list[tuple[dict, int]]:
-    candidate_phonetic = _phonetic_signature(candidate)
+    *,
+    signature: str | None = None,
+    normalized: tuple[str, str | None, str] | None = None,
+    clean: str | None = None,
+    full_scan_fallback: bool = False,
+) -> list[tuple[int, int]]:
+    """Finn fonetiske treff for ``candidate`` som (indeks, justering).
+
+    ``signature``, ``normalized`` og ``clean`` kan sendes inn når kallet
+    allerede har beregnet :func:`_phonetic_signature`,
+    :func:`_normalize_name` og :func:`_clean_letters`.
+
+    Med ``full_scan_fallback`` skannes hele indeksen når ingen oppføring har
+    kandidatens forbokstav (brukes med coord=, se under).
+    """
+
+    candidate_phonetic = (
+        signature if signature is not None else _phonetic_signature(candidate)
+    )
     if debug_log:
         debug_log(f"  Fonetisk søk for {candidate!r} (signatur {candidate_phonetic!r})")
-    candidate_norm, candidate_category, candidate_stem = _normalize_name(
-        candidate, ending_map, suffixes
-    )
+    if normalized is None:
+        normalized = _normalize_name(candidate, ending_map, suffixes)
+    candidate_norm, candidate_category, candidate_stem = normalized
     candidate_stem_clean = _clean_letters(candidate_stem)
     candidate_stem_signature = (
         _phonetic_signature(candidate_stem) if candidate_stem else candidate_phonetic
     )
 
-    matches: list[tuple[dict, int]] = []
+    matches: list[tuple[int, int]] = []
     if not candidate_phonetic:
         if debug_log:
             debug_log("    Ingen fonetisk signatur, hopper over.")
         return matches
 
-    candidate_first_letter = _clean_letters(candidate)[:1]
-    if candidate_first_letter:
-        candidate_indices = prepared_index.first_letter_lookup.get(
-            candidate_first_letter, prepared_index.all_indices
-        )
+    candidate_clean = clean if clean is not None else _clean_letters(candidate)
+    candidate_first_letter = candidate_clean[:1]
+    if candidate_first_letter not in prepared_index.first_letter_lookup:
+        # Uten felles forbokstav får alle treff -50, dvs. høyst 25 poeng. Det er
+        # under _MIN_RESULT_SCORE, så uten coord= kan vi hoppe over. Med coord=
+        # kan koordinatbonusen (opptil +25) løfte et slikt treff til 50, og
+        # treffene påvirker fordelingen av bonusplassene, så da skannes hele
+        # indeksen som før.
+        if not candidate_first_letter or not full_scan_fallback:
+            if debug_log:
+                debug_log("    Ingen oppføringer med samme forbokstav, hopper over.")
+            return matches
+        if debug_log:
+            debug_log("    Ingen oppføringer med samme forbokstav, skanner hele indeksen.")
+        candidate_indices: Sequence[int] = range(len(prepared_index.entries))
+    elif debug_log:
+        # Hele forbokstav-bøtta, slik at loggen også viser nesten-treff
+        candidate_indices = prepared_index.first_letter_lookup[candidate_first_letter]
     else:
-        candidate_indices = prepared_index.all_indices
+        candidate_indices = _phonetic_bktree_indices(
+            prepared_index,
+            candidate_first_letter,
+            (candidate_phonetic, candidate_stem_signature),
+        )
 
-    for idx in candidate_indices:
-        entry_data = prepared_index.prepared_entries[idx]
-        entry = entry_data.entry
-        navn = entry_data.navn
+    candidate_code = _signature_code(candidate_phonetic)
+    candidate_stem_code = _signature_code(candidate_stem_signature)
+    candidate_casefold = sys.intern(candidate.casefold())
+    navns = prepared_index.navns
+    navn_casefolds = prepared_index.navn_casefolds
+    navn_cleans = prepared_index.navn_cleans
+    navn_signatures = prepared_index.navn_signatures
+    navn_signature_codes = prepared_index.navn_signature_codes
+    stem_signature_codes = prepared_index.stem_signature_codes
+    categories = prepared_index.categories
+    stem_cleans = prepared_index.stem_cleans
+    stem_signatures = prepared_index.stem_signatures
+
+    # Vanlig Python-løkke med vilje: etter BK-treet gjenstår typisk et par
+    # dusin oppføringer per kandidat, og da koster numpy-oppsett mer enn det
+    # sparer. I debugmodus (hele forbokstav-bøtta) er farten uviktig.
+    # Med rapidfuzz og numpy regnes alle signaturavstandene ut i ett C-kall:
+    # rad 0/1 er kandidatens signatur/stammesignatur, kolonne 2*pos og
+    # 2*pos + 1 er navne-/stammesignaturen til candidate_indices[pos]
+    signature_distances: list[list[int]] | None = None
+    if (
+        _rapidfuzz_process is not None
+        and np is not None
+        and len(candidate_indices) >= _CDIST_MIN_ENTRIES
+    ):
+        entry_signature_list: list[str] = []
+        for idx in candidate_indices:
+            entry_signature_list.append(navn_signatures[idx])
+            entry_signature_list.append(stem_signatures[idx])
+        signature_distances = _rapidfuzz_process.cdist(
+            (candidate_phonetic, candidate_stem_signature),
+            entry_signature_list,
+            scorer=_rapidfuzz_levenshtein.distance,
+            # Toleransen er maks 2, så dette er max(allowed, debuggrensen)
+            score_cutoff=_PHONETIC_DEBUG_DISTANCE,
+            dtype=np.int32,
+        ).tolist()
+
+    for pos, idx in enumerate(candidate_indices):
+        navn = navns[idx]
         if not isinstance(navn, str):
             continue
 
-        if navn.casefold() == candidate.casefold():
+        if navn_casefolds[idx] == candidate_casefold:
             continue
 
-        entry_signature_full = entry_data.navn_signature
-        entry_category = entry_data.category
-        entry_stem = entry_data.stem
-        entry_stem_clean = entry_data.stem_clean
-        entry_stem_signature = entry_data.stem_signature
+        entry_signature_full = navn_signatures[idx]
+        entry_stem_signature = stem_signatures[idx]
+        # Billig nedre grense først; med debuglogg beregnes alle avstander
+        if not debug_log:
+            navn_code = navn_signature_codes[idx]
+            stem_code = stem_signature_codes[idx]
+            if not (
+                _signatures_may_match(
+                    candidate_phonetic, candidate_code, entry_signature_full, navn_code
+                )
+                or _signatures_may_match(
+                    candidate_stem_signature,
+                    candidate_stem_code,
+                    entry_signature_full,
+                    navn_code,
+                )
+                or _signatures_may_match(
+                    candidate_phonetic, candidate_code, entry_stem_signature, stem_code
+                )
+                or _signatures_may_match(
+                    candidate_stem_signature,
+                    candidate_stem_code,
+                    entry_stem_signature,
+                    stem_code,
+                )
+            ):
+                continue
 
-        signature_pairs: list[tuple[str, str]] = []
-        seen_pairs: set[tuple[str, str]] = set()
+        entry_category = categories[idx]
+        entry_stem_clean = stem_cleans[idx]
 
-        def _add_pair(cand_sig: str | None, entry_sig: str | None) -> None:
+        seen_pairs: set[tuple[str, str]] = set()
+        best_signature_distance: int | None = None
+        for row, cand_sig, column, entry_sig in (
+            (0, candidate_phonetic, 2 * pos, entry_signature_full),
+            (1, candidate_stem_signature, 2 * pos, entry_signature_full),
+            (0, candidate_phonetic, 2 * pos + 1, entry_stem_signature),
+            (1, candidate_stem_signature, 2 * pos + 1, entry_stem_signature),
+        ):
             if not cand_sig or not entry_sig:
-                return
+                continue
             pair = (cand_sig, entry_sig)
-            if pair not in seen_pairs:
-                seen_pairs.add(pair)
-                signature_pairs.append(pair)
-
-        _add_pair(candidate_phonetic, entry_signature_full)
-        _add_pair(candidate_stem_signature, entry_signature_full)
-        _add_pair(candidate_phonetic, entry_stem_signature)
-        _add_pair(candidate_stem_signature, entry_stem_signature)
-
-        best_signature_distance: int | None = None
-        for cand_sig, entry_sig in signature_pairs:
-            allowed_distance, signature_distance = _phonetic_tolerance(cand_sig, entry_sig)
-            if allowed_distance < 0:
+            if pair in seen_pairs:
                 continue
+            seen_pairs.add(pair)
+            if signature_distances is not None:
+                allowed_distance = _phonetic_allowed_distance(
+                    max(len(cand_sig), len(entry_sig))
+                )
+                signature_distance = signature_distances[row][column]
+            else:
+                allowed_distance, signature_distance = _phonetic_tolerance(
+                    cand_sig, entry_sig
+                )
             if signature_distance > allowed_distance:
-                if debug_log and signature_distance <= 3:
+                if debug_log and signature_distance <= _PHONETIC_DEBUG_DISTANCE:
                     debug_log(
                         f"    Forkastet fonetisk treff {navn!r}: signatur {entry_sig!r}"
                         f" vs {cand_sig!r} (dist {signature_distance} > {allowed_distance})"
@@ -866,7 +1611,10 @@ def _phonetic_matches(
         if best_signature_distance is None:
             continue
 
-        if not _stems_within_tolerance(candidate_stem_clean, entry_stem_clean):
+        stem_distance = _stem_distance_within_tolerance(
+            candidate_stem_clean, entry_stem_clean
+        )
+        if stem_distance is None:
             if debug_log:
                 debug_log(
                     f"    Forkastet fonetisk treff {navn!r}: stamme {entry_stem_clean!r}"
@@ -874,8 +1622,13 @@ def _phonetic_matches(
                 )
             continue
 
-        score = _startswith_bonus(candidate, navn)
-        if not _first_letter_matches(candidate, navn):
+        navn_clean = navn_cleans[idx]
+        score, first_letter_matches = _startswith_score(candidate_clean, navn_clean)
+        # Feil forbokstav gir høyst 50 - 50 + 5 + 20 = 25 < _MIN_RESULT_SCORE, men
+        # treffet kan ikke hoppes over her: koordinatbonusen fordeles etter
+        # avstandsrekkefølgen blant alle registrerte treff. Forbokstav-bøttene
+        # gjør at dette bare skjer for navn uten bokstaver og ved full skann.
+        if not first_letter_matches:
             score -= 50
 
         # Bonus hvis kategoriene matcher (typisk ELV/VANN)
@@ -884,31 +1637,97 @@ def _phonetic_matches(
         if best_signature_distance:
             score -= best_signature_distance * 5
 
-        stem_bonus = 0
-        if candidate_stem_clean and entry_stem_clean:
-            stem_distance = _levenshtein(candidate_stem_clean, entry_stem_clean)
-            if stem_distance <= 1:
-                stem_bonus = 20 - stem_distance * 5  # 20 for 0, 15 for 1
-            else:
-                stem_bonus = -5 * (stem_distance - 1)
-            score += stem_bonus
+        # Stammene er ikke tomme her, og avstanden innenfor toleransen er eksakt
+        if stem_distance <= 1:
+            stem_bonus = 20 - stem_distance * 5  # 20 for 0, 15 for 1
+        else:
+            stem_bonus = -5 * (stem_distance - 1)
+        score += stem_bonus
 
         if debug_log:
+            bonus_part = f", stambonus {stem_bonus}" if stem_bonus else ""
             debug_log(
                 f"    Fonetisk treff {navn!r} med justering {score}"
-                + (
-                    f" (signaturdist {best_signature_distance}"
-                    + (f", stammedist {stem_distance}" if candidate_stem_clean and entry_stem_clean else "")
-                    + (f", stambonus {stem_bonus}" if stem_bonus else "")
-                    + ")"
-                )
+                f" (signaturdist {best_signature_distance}, stammedist {stem_distance}"
+                f"{bonus_part})"
             )
-        matches.append((entry, score))
+        matches.append((idx, score))
 
     return matches
 
 
+def _bktree_insert(trees: dict[str, list], key: str, word: str, idx: int) -> None:
+    """Legg ``idx`` inn under ``word`` i BK-treet for ``key``.
+
+    Nodene er lister ``[streng, indekser, {avstand: barn}]`` slik at treet kan
+    lagres i pickle-cachen uten egne klasser. Samme streng deler node.
+    """
+
+    node = trees.get(key)
+    if node is None:
+        trees[key] = [word, [idx], {}]
+        return
+    while True:
+        if word == node[0]:
+            if node[1][-1] != idx:
+                node[1].append(idx)
+            return
+        distance = _levenshtein(word, node[0])
+        child = node[2].get(distance)
+        if child is None:
+            node[2][distance] = [word, [idx], {}]
+            return
+        node = child
+
+
+def _phonetic_bktree_indices(
+    prepared_index: PreparedIndex,
+    first_letter: str,
+    signatures: Iterable[str],
+) -> list[int]:
+    """Finn indekser med samme forbokstav og en signatur innen fonetisk toleranse.
+
+    Toleransen fra :func:`_phonetic_allowed_distance` er maks 2, så BK-treet
+    søkes med radius 2 for hver av kandidatens signaturer; oppføringer utenfor
+    kan aldri gi treff. Indeksene returneres i indeksrekkefølge.
+    """
+
+    root = prepared_index.phonetic_bktrees.get(first_letter)
+    if root is None:
+        return []
+    radius = _phonetic_allowed_distance(sys.maxsize)
+    indices: set[int] = set()
+    for signature in set(signatures):
+        if not signature:
+            continue
+        stack = [root]
+        while stack:
+            node_word, node_indices, children = stack.pop()
+            # Avstanden trengs bare eksakt opp til største barnenøkkel + radius
+            bound = max(children) + radius if children else radius
+            distance = _levenshtein(signature, node_word, score_cutoff=bound)
+            if distance <= radius:
+                indices.update(node_indices)
+            if distance > bound:
+                continue
+            for child_distance in range(distance - radius, distance + radius + 1):
+                child = children.get(child_distance)
+                if child is not None:
+                    stack.append(child)
+    return sorted(indices)
+
+
+@lru_cache(maxsize=4096)
 def _phonetic_signature(text: str) -> str:
+    """Grov uttaleform av ``text`` for fonetisk sammenligning.
+
+    Bevisst enkel og norsk: ch/ph/th forenkles, «aa» blir «å», bindestrek og
+    mellomrom fjernes og doble bokstaver slås sammen. Vokalene beholdes, siden
+    de ofte er det eneste som skiller vassdragsnavn (engelske kodere som
+    Metaphone og Soundex fjerner dem). Oppføringenes signaturer beregnes én
+    gang i :class:`PreparedIndex`; per søk gjelder dette bare kandidatene.
+    """
+
     if not text:
         return ""
 
@@ -927,6 +1746,11 @@ def _phonetic_signature(text: str) -> str:
     if lowered.startswith("c"):
         lowered = "k" + lowered[1:]
 
+    # Uten like nabotegn er det ingenting å slå sammen (gjelder over halvparten
+    # av navnene i indeksen), og Python-løkken under kan hoppes over
+    if _REPEATED_CHAR_RE.search(lowered) is None:
+        return lowered
+
     result: list[str] = []
     previous_char = ""
     for char in lowered:
@@ -938,9 +1762,45 @@ def _phonetic_signature(text: str) -> str:
     return "".join(result)
 
 
-def _stems_within_tolerance(candidate: str, entry: str) -> bool:
-    if not candidate or not entry:
+def _signature_code(signature: str) -> int:
+    """Lag en bitmaske over tegnene i ``signature`` (ett bit per tegn mod 64).
+
+    Hvert tegn som finnes i den ene signaturen men ikke den andre krever minst
+    én redigering, så antall bit i ``a & ~b`` er en nedre grense for
+    Levenshtein-avstanden (kollisjoner gjør bare grensen svakere).
+    """
+
+    code = 0
+    for char in signature:
+        code |= 1 << (ord(char) & 63)
+    return code
+
+
+def _signatures_may_match(sig_a: str, code_a: int, sig_b: str, code_b: int) -> bool:
+    """Kan ``sig_a`` og ``sig_b`` ligge innenfor fonetisk toleranse?
+
+    Sjekker lengdeforskjell og tegnmaskene fra :func:`_signature_code` mot
+    toleransen fra :func:`_phonetic_tolerance` uten å regne ut avstanden.
+    """
+
+    if not sig_a or not sig_b:
         return False
+    allowed = _phonetic_allowed_distance(max(len(sig_a), len(sig_b)))
+    return (
+        abs(len(sig_a) - len(sig_b)) <= allowed
+        and (code_a & ~code_b).bit_count() <= allowed
+        and (code_b & ~code_a).bit_count() <= allowed
+    )
+
+
+def _stem_distance_within_tolerance(candidate: str, entry: str) -> int | None:
+    """Avstanden mellom stammene hvis den er innenfor toleransen, ellers None.
+
+    Avstanden gjenbrukes til stammebonusen, så paret regnes bare ut én gang.
+    """
+
+    if not candidate or not entry:
+        return None
 
     length = max(len(candidate), len(entry))
     if length <= 3:
@@ -950,117 +1810,217 @@ def _stems_within_tolerance(candidate: str, entry: str) -> bool:
     else:
         allowed = 2
 
-    return _levenshtein(candidate, entry) <= allowed
+    distance = _levenshtein(candidate, entry, score_cutoff=allowed)
+    return distance if distance <= allowed else None
 
 
 def _phonetic_tolerance(sig_a: str, sig_b: str) -> tuple[int, int]:
     if not sig_a or not sig_b:
         return -1, 0
 
-    length = max(len(sig_a), len(sig_b))
+    allowed = _phonetic_allowed_distance(max(len(sig_a), len(sig_b)))
+    # Debugloggen viser eksakte avstander opp til _PHONETIC_DEBUG_DISTANCE
+    distance = _levenshtein(
+        sig_a, sig_b, score_cutoff=max(allowed, _PHONETIC_DEBUG_DISTANCE)
+    )
+    return allowed, distance
+
+
+def _phonetic_allowed_distance(length: int) -> int:
     if length <= 4:
-        allowed = 0
-    elif length <= 8:
-        allowed = 1
-    else:
-        allowed = 2
+        return 0
+    if length <= 8:
+        return 1
+    return 2
 
-    distance = _levenshtein(sig_a, sig_b)
-    return allowed, distance
 
+def _levenshtein(a: str, b: str, score_cutoff: int | None = None) -> int:
+    """Levenshtein-avstand mellom ``a`` og ``b``.
 
-def _levenshtein(a: str, b: str) -> int:
-    if len(a) < len(b):
+    Med ``score_cutoff`` er bare avstander opp til grensen eksakte; større
+    avstander returneres som ``score_cutoff + 1``.
+    """
+
+    if _rapidfuzz_levenshtein is not None:
+        # Bit-parallell C++-implementasjon; samme avstand som løkken under
+        return _rapidfuzz_levenshtein.distance(a, b, score_cutoff=score_cutoff)
+
+    # Avstanden er symmetrisk; med fast rekkefølge (lengste først) gir samme
+    # par samme cachenøkkel, og kjernene under slipper å bytte selv
+    if len(a) < len(b) or (len(a) == len(b) and b < a):
         a, b = b, a
+    return _levenshtein_cached(a, b, score_cutoff)
+
+
+@lru_cache(maxsize=16384)
+def _levenshtein_cached(a: str, b: str, score_cutoff: int | None) -> int:
+    """Cachet avstand uten rapidfuzz; ``a`` må være minst like lang som ``b``."""
+
+    if _levenshtein_jit is not None:
+        # Uten grense dekker båndet hele matrisen
+        limit = len(a) if score_cutoff is None else score_cutoff
+        return int(
+            _levenshtein_jit(_encode_code_points(a), _encode_code_points(b), limit)
+        )
+
+    # Myers er O(len) uansett grense, og slår Ukkonen-båndet allerede fra k = 2
+    distance = _levenshtein_myers(a, b)
+    if score_cutoff is not None and distance > score_cutoff:
+        return score_cutoff + 1
+    return distance
+
+
+def _levenshtein_myers(a: str, b: str) -> int:
+    """Levenshtein-avstand med Myers/Hyyrös' bit-parallelle algoritme.
+
+    En hel DP-kolonne ligger i ett heltall (én bit per tegn i den korteste
+    strengen), så hvert tegn i den lengste koster en håndfull bitoperasjoner
+    i stedet for en indre løkke. Pythons heltall har ingen 64-bitsgrense.
+    ``a`` må være minst like lang som ``b``.
+    """
 
     if not b:
         return len(a)
 
-    previous_row = list(range(len(b) + 1))
-    for i, char_a in enumerate(a, 1):
-        current_row = [i]
-        for j, char_b in enumerate(b, 1):
-            insert = current_row[j - 1] + 1
-            delete = previous_row[j] + 1
-            substitute = previous_row[j - 1] + (char_a != char_b)
-            current_row.append(min(insert, delete, substitute))
-        previous_row = current_row
-    return previous_row[-1]
-
-
-def _startswith_bonus(candidate: str, navn: str) -> int:
-    cand = _clean_letters(candidate)
-    target = _clean_letters(navn)
-    bonus = 0
-    for char_cand, char_target in zip(cand, target):
-        if char_cand == char_target:
-            bonus += 3
-        else:
-            break
-    return bonus
-
+    # Bitmaske per tegn: hvilke posisjoner i b tegnet forekommer på
+    peq: dict[str, int] = {}
+    bit = 1
+    for char in b:
+        peq[char] = peq.get(char, 0) | bit
+        bit <<= 1
+    mask = bit - 1
+    last = bit >> 1
+    get = peq.get
+
+    # Positive/negative vertikale differanser i gjeldende kolonne
+    pv = mask
+    mv = 0
+    distance = len(b)
+    for char in a:
+        eq = get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = (ph << 1) | 1
+        pv = ((mh << 1) | ~(xv | ph)) & mask
+        mv = ph & xv
+    return distance
+
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True)
+    def _levenshtein_jit(a, b, k):
+        """Levenshtein-avstand begrenset til ``k`` (Ukkonen-bånd) på kodepunkt-arrays.
+
+        Bare cellene med ``|i - j| <= k`` fylles ut, og løkken avbrytes når en
+        hel rad overstiger grensen; da returneres ``k + 1``. Med
+        ``k >= len(a)`` dekker båndet hele matrisen og avstanden er eksakt.
+        ``a`` må være minst like lang som ``b``.
+        """
+        len1 = a.shape[0]
+        len2 = b.shape[0]
+        limit = k + 1
+        if len1 - len2 > k:
+            return limit
+        if len2 == 0:
+            return len1
+
+        # To rader per kall som byttes per iterasjon; allokeringen i numba er
+        # billig og holder funksjonen trådsikker (ingen delte modulbuffere)
+        previous_row = np.empty(len2 + 1, np.int64)
+        current_row = np.empty(len2 + 1, np.int64)
+        for j in range(len2 + 1):
+            previous_row[j] = j if j <= k else limit
+        for i in range(1, len1 + 1):
+            c1 = a[i - 1]
+            for j in range(len2 + 1):
+                current_row[j] = limit
+            if i <= k:
+                current_row[0] = i
+            row_min = current_row[0]
+            for j in range(max(1, i - k), min(len2, i + k) + 1):
+                # Grenløs min: (x - y) >> 63 er -1 når x < y og 0 ellers
+                value = previous_row[j - 1] + np.int64(c1 != b[j - 1])
+                diff = current_row[j - 1] + 1 - value
+                value += diff & (diff >> 63)
+                diff = previous_row[j] + 1 - value
+                value += diff & (diff >> 63)
+                diff = limit - value
+                value += diff & (diff >> 63)
+                current_row[j] = value
+                diff = value - row_min
+                row_min += diff & (diff >> 63)
+            if row_min > k:
+                return limit
+            previous_row, current_row = current_row, previous_row
+        return previous_row[len2]
+
+    @lru_cache(maxsize=16384)
+    def _encode_code_points(text: str) -> np.ndarray:
+        """Unicode-kodepunkter som uint32-array (æ/ø/å får egne koder).
+
+        Kandidatens signatur møter mange oppføringer, og oppføringenes
+        signaturer går igjen på tvers av søk, så arrayene caches per streng.
+        Arrayene er skrivebeskyttet (``frombuffer`` over ``bytes``).
+        """
+        return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    # Kompiler (eller les fra numba-cachen) ved import, ikke ved første søk
+    _levenshtein_jit(_encode_code_points("ab"), _encode_code_points("b"), 1)
+else:
+    _levenshtein_jit = None
+
+
+def _startswith_score(cand: str, target: str) -> tuple[int, bool]:
+    """Startbonus og forbokstavsjekk for to strenger renset med :func:`_clean_letters`.
+
+    Gir 3 poeng per felles startbokstav, og om forbokstaven er lik (som er det
+    samme som at bonusen er positiv).
+    """
 
-def _first_letter_matches(candidate: str, navn: str) -> bool:
-    cand = _clean_letters(candidate)
-    target = _clean_letters(navn)
-    if not cand or not target:
-        return False
-    return cand[0] == target[0]
+    common = len(commonprefix((cand, target)))
+    return common * 3, common > 0
 
 
+@lru_cache(maxsize=4096)
 def _clean_letters(text: str) -> str:
-    return re.sub(r"[^a-zæøå]", "", text.casefold())
+    # re.sub er målt raskere enn både str.translate (tabellen må dekke hele
+    # Unicode, f.eks. samiske bokstaver, og blir et dict-oppslag per tegn) og
+    # "".join(filter(...)); oppføringenes navn renses uansett bare én gang
+    return _NON_LETTER_RE.sub("", text.casefold())
 
 
 def _cli(argv: Sequence[str]) -> int:
-    debug = False
-    lon: float | None = None
-    lat: float | None = None
-    args: list[str] = []
-
-    i = 1
-    while i < len(argv):
-        item = argv[i]
-        if item == "--debug":
-            debug = True
-            i += 1
-            continue
-        if item == "--lon":
-            if i + 1 >= len(argv):
-                print("Flagget --lon krever en verdi.", file=sys.stderr)
-                return 1
-            try:
-                lon = float(argv[i + 1])
-            except ValueError:
-                print("Lon må være et tall.", file=sys.stderr)
-                return 1
-            i += 2
-            continue
-        if item == "--lat":
-            if i + 1 >= len(argv):
-                print("Flagget --lat krever en verdi.", file=sys.stderr)
-                return 1
-            try:
-                lat = float(argv[i + 1])
-            except ValueError:
-                print("Lat må være et tall.", file=sys.stderr)
-                return 1
-            i += 2
-            continue
-        args.append(item)
-        i += 1
+    # Importeres her så biblioteksbruk av modulen slipper argparse
+    import argparse
 
-    if (lon is None) != (lat is None):
+    parser = argparse.ArgumentParser(
+        prog=Path(argv[0]).name if argv else None,
+        description="Slå opp vassdragsnavn i INDEX_regine.json.",
+    )
+    parser.add_argument("--debug", action="store_true", help="Skriv ut debug-logg")
+    parser.add_argument("--lon", type=float, help="Lengdegrad for koordinatbonus")
+    parser.add_argument("--lat", type=float, help="Breddegrad for koordinatbonus")
+    parser.add_argument(
+        "query",
+        nargs="*",
+        help="Vassdragsnavn (default: Tokke-Vinjevassdraget)",
+    )
+    args = parser.parse_args(list(argv[1:]))
+
+    if (args.lon is None) != (args.lat is None):
         print("Oppgi både --lon og --lat for koordinatbonus.", file=sys.stderr)
         return 1
 
-    coord_arg = (lon, lat) if lon is not None and lat is not None else None
-
-    if args:
-        query = " ".join(args).strip()
-    else:
-        query = "Tokke-Vinjevassdraget"
+    coord_arg = (args.lon, args.lat) if args.lon is not None else None
+    debug = args.debug
 
+    query = " ".join(args.query).strip() if args.query else "Tokke-Vinjevassdraget"
     if not query:
         print("Oppgi et vassdragsnavn å slå opp.", file=sys.stderr)
         return 1
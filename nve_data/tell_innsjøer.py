@@ -14,6 +14,12 @@ import json
 import pandas as pd
 from pathlib import Path
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson er valgfri - json.loads gir samme resultat, bare tregere
+    _json_loads = json.loads
+
 DATAFIL = Path("innsjo_attr.json")
 
 
@@ -26,9 +32,20 @@ def load_data(path: Path) -> pd.DataFrame:
         {"vatnLnr": 66750, ...}
     ]
     """
-    with path.open(encoding="utf-8") as f:
-        data = json.load(f)
-    return pd.DataFrame(data)
+    data = _json_loads(path.read_bytes())
+    return pd.DataFrame.from_records(data)
+
+
+def mangler_tekst(serie: pd.Series) -> pd.Series:
+    """Maske for verdier som mangler eller bare består av blanke tegn.
+
+    ``.str`` gir NaN for ikke-strenger, og NaN er aldri lik "", så vi slipper
+    å gjøre hele kolonnen om til str først.
+    """
+    mangler = serie.isna()
+    if serie.dtype == object:
+        mangler |= serie.str.strip().eq("")
+    return mangler
 
 
 def main() -> None:
@@ -37,10 +54,10 @@ def main() -> None:
     total = len(df)
 
     # Sett opp «mangler»-masker
-    m_name = df["navn"].isna() | (df["navn"].astype(str).str.strip() == "")
+    m_name = mangler_tekst(df["navn"])
     m_hoyde = df["hoyde"].isna()
     m_areal = df["areal_km2"].isna()
-    m_kommune = df["kommune"].isna() | (df["kommune"].astype(str).str.strip() == "")
+    m_kommune = mangler_tekst(df["kommune"])
 
     # Utskrift
     print(f"Antall innsjøer: {total}")
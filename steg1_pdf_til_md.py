@@ -1,22 +1,44 @@
 import argparse
+import hashlib
 import os
 import pypdf # Tidligere PyPDF2
 import google.generativeai as genai
 from openai import AzureOpenAI
 from dotenv import load_dotenv
 import pathlib # For å jobbe med filstier på en objektorientert måte
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Under dette antallet sider koster oppstart av egne prosesser mer enn det sparer
+PARALLEL_MIN_PAGES = 32
+
+def _extract_page_range(pdf_path, start, end):
+    """Trekker ut tekst fra sidene start..end-1. Kjøres i en egen prosess som åpner PDF-en selv."""
+    with open(pdf_path, 'rb') as file:
+        reader = pypdf.PdfReader(file)
+        return [reader.pages[page_num].extract_text() for page_num in range(start, end)]
 
 def extract_text_from_pdf(pdf_path):
-    """Trekker ut all tekst fra en PDF-fil."""
+    """Trekker ut all tekst fra en PDF-fil.
+
+    Store PDF-er deles i sammenhengende sideområder som trekkes ut parallelt
+    i egne prosesser; tekstuthentingen i pypdf er ren Python og CPU-bundet.
+    """
     print(f"Trekker ut tekst fra: {pdf_path}...")
     try:
         with open(pdf_path, 'rb') as file:
             reader = pypdf.PdfReader(file)
-            text_parts = []
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-                text_parts.append(page.extract_text())
-            
+            num_pages = len(reader.pages)
+            workers = min(os.cpu_count() or 1, num_pages // PARALLEL_MIN_PAGES)
+            if workers < 2:
+                text_parts = [reader.pages[page_num].extract_text() for page_num in range(num_pages)]
+            else:
+                chunk_size = -(-num_pages // workers) # Avrunder opp
+                ranges = [(start, min(start + chunk_size, num_pages)) for start in range(0, num_pages, chunk_size)]
+                with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                    futures = [executor.submit(_extract_page_range, pdf_path, start, end) for start, end in ranges]
+                    # Resultatene hentes i innsendingsrekkefølge, så sidene kommer i riktig rekkefølge
+                    text_parts = [text for future in futures for text in future.result()]
+
             full_text = "\n".join(filter(None, text_parts)) # Filter(None, ...) fjerner tomme strenger
             if not full_text.strip():
                 print("ADVARSEL: Ingen tekst ble trukket ut fra PDF-en. Er den bildebasert eller passordbeskyttet?")
@@ -33,12 +55,71 @@ def extract_text_from_pdf(pdf_path):
         print(f"FEIL: En uventet feil oppstod under tekstuthenting: {e}")
         return None
 
+def build_markdown_prompt(text_content):
+    """Lager prompten for Markdown-konvertering (lik for alle providere).
+
+    Instruksjonene står først og er identiske i hvert kall, og bare teksten
+    på slutten varierer. Da kan providerne gjenbruke prompt-prefikset
+    (automatisk prompt-caching) når instruksjonene blir lange nok.
+    """
+    # Detaljert prompt basert på vår tidligere samtale
+    return f"""
+Du er en ekspert på å konvertere tekstinnhold, ofte fra OCR (Optical Character Recognition), til perfekt Markdown.
+Din oppgave er å ta følgende tekst og formatere den som Markdown, og følge disse reglene nøye:
+
+1.  **Nøyaktighet:** Behold all tekst nøyaktig slik den er. Ikke endre, legg til eller fjern ord med mindre det er for å korrigere åpenbare OCR-feil som er tydelig ulogiske (men vær forsiktig med dette).
+2.  **Struktur:** Identifiser overskrifter (H1, H2, etc.), lister (nummererte og punktmerkede), fet tekst, kursiv tekst, og bruk passende Markdown-syntaks.
+3.  **Linjeskift:**
+    *   For linjeskift innad i det som ser ut som et sammenhengende avsnitt, spesielt etter korte linjer som i adresser eller metadata-blokker, bruk to mellomrom på slutten av linjen for å tvinge frem et linjeskift (`  \\n`).
+    *   Bruk standard Markdown-avsnitt (en tom linje mellom avsnitt) for større tekstblokker.
+4.  **Horisontale linjer:** For horisontale linjer (`---` eller `***`), sørg for at det er en tom linje *før* dem for å unngå at linjen over blir tolket som en H2-overskrift.
+5.  **Kodeblokker/Sitater:** Hvis du ser noe som ligner på kode eller lengre sitater, bruk passende Markdown (f.eks. ``` for kode, > for sitater).
+6.  **Tabeller:** Hvis det er tabulære data, prøv å formatere dem som Markdown-tabeller hvis mulig. Dette kan være vanskelig med ren tekst fra OCR.
+7.  **Spesialtegn:** Behandle spesialtegn korrekt (f.eks. escape dem om nødvendig, men behold dem som de er hvis de er en del av innholdet).
+8.  **Sideindikatorer:** Hvis du ser klare sideindikatorer som "Side X" eller lignende, kan du vurdere å lage en `---` (horisontal linje) før dem for å skille sider, men inkluder selve sideindikatoren i Markdown-outputen.
+
+Vennligst konverter følgende tekst til Markdown:
+
+--- START PÅ TEKST ---
+{text_content}
+--- SLUTT PÅ TEKST ---
+"""
+
+def _response_cache_path(provider, model_name, prompt):
+    """Sti til mellomlagret svar for en gitt provider, modell og prompt.
+
+    Mappen kan overstyres med miljøvariabelen NVE_SMARTDOK_CACHE_DIR.
+    """
+    cache_dir = pathlib.Path(os.getenv("NVE_SMARTDOK_CACHE_DIR") or pathlib.Path.home() / ".cache" / "nve_smartdok")
+    key = hashlib.sha256(f"{provider}\0{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+    return cache_dir / f"{key}.md"
+
+def _read_cached_markdown(cache_path):
+    """Returnerer mellomlagret Markdown, eller None hvis det ikke finnes."""
+    try:
+        return cache_path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+def _write_cached_markdown(cache_path, markdown_output):
+    """Lagrer Markdown i cachen. Skrives via en midlertidig fil så en avbrutt kjøring ikke etterlater halve svar."""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(markdown_output, encoding="utf-8")
+        tmp_path.replace(cache_path)
+    except OSError as e:
+        print(f"ADVARSEL: Kunne ikke lagre svaret i cachen ({cache_path}): {e}")
+
 def get_ai_provider():
     """Henter AI-provider fra miljøvariabler."""
     return os.getenv("AI_PROVIDER", "gemini").lower()
 
-def convert_text_to_markdown_azure_openai(text_content):
-    """Konverterer gitt tekst til Markdown ved hjelp av Azure OpenAI API."""
+def convert_text_to_markdown_azure_openai(text_content, use_cache=True):
+    """Konverterer gitt tekst til Markdown ved hjelp av Azure OpenAI API.
+
+    Med use_cache gjenbrukes et tidligere svar for nøyaktig samme prompt og deployment.
+    """
     print("Konverterer tekst til Markdown med Azure OpenAI...")
 
     # Hent konfigurasjonsvariabler
@@ -58,28 +139,14 @@ def convert_text_to_markdown_azure_openai(text_content):
             api_version=api_version or "2024-02-01"
         )
 
-        # Samme detaljerte prompt som for Gemini
-        prompt = f"""
-Du er en ekspert på å konvertere tekstinnhold, ofte fra OCR (Optical Character Recognition), til perfekt Markdown.
-Din oppgave er å ta følgende tekst og formatere den som Markdown, og følge disse reglene nøye:
+        prompt = build_markdown_prompt(text_content)
 
-1.  **Nøyaktighet:** Behold all tekst nøyaktig slik den er. Ikke endre, legg til eller fjern ord med mindre det er for å korrigere åpenbare OCR-feil som er tydelig ulogiske (men vær forsiktig med dette).
-2.  **Struktur:** Identifiser overskrifter (H1, H2, etc.), lister (nummererte og punktmerkede), fet tekst, kursiv tekst, og bruk passende Markdown-syntaks.
-3.  **Linjeskift:**
-    *   For linjeskift innad i det som ser ut som et sammenhengende avsnitt, spesielt etter korte linjer som i adresser eller metadata-blokker, bruk to mellomrom på slutten av linjen for å tvinge frem et linjeskift (`  \\n`).
-    *   Bruk standard Markdown-avsnitt (en tom linje mellom avsnitt) for større tekstblokker.
-4.  **Horisontale linjer:** For horisontale linjer (`---` eller `***`), sørg for at det er en tom linje *før* dem for å unngå at linjen over blir tolket som en H2-overskrift.
-5.  **Kodeblokker/Sitater:** Hvis du ser noe som ligner på kode eller lengre sitater, bruk passende Markdown (f.eks. ``` for kode, > for sitater).
-6.  **Tabeller:** Hvis det er tabulære data, prøv å formatere dem som Markdown-tabeller hvis mulig. Dette kan være vanskelig med ren tekst fra OCR.
-7.  **Spesialtegn:** Behandle spesialtegn korrekt (f.eks. escape dem om nødvendig, men behold dem som de er hvis de er en del av innholdet).
-8.  **Sideindikatorer:** Hvis du ser klare sideindikatorer som "Side X" eller lignende, kan du vurdere å lage en `---` (horisontal linje) før dem for å skille sider, men inkluder selve sideindikatoren i Markdown-outputen.
-
-Vennligst konverter følgende tekst til Markdown:
-
---- START PÅ TEKST ---
-{text_content}
---- SLUTT PÅ TEKST ---
-"""
+        cache_path = _response_cache_path("azure_openai", deployment, prompt)
+        if use_cache:
+            cached_output = _read_cached_markdown(cache_path)
+            if cached_output:
+                print(f"Bruker mellomlagret Markdown fra {cache_path}.")
+                return cached_output
 
         response = client.chat.completions.create(
             model=deployment,
@@ -95,6 +162,8 @@ Vennligst konverter følgende tekst til Markdown:
             print("ADVARSEL: Azure OpenAI returnerte tom Markdown. Sjekk prompt eller input-tekst.")
             return None
 
+        if use_cache:
+            _write_cached_markdown(cache_path, markdown_output)
         print("Markdown-konvertering fullført.")
         return markdown_output
 
@@ -102,8 +171,11 @@ Vennligst konverter følgende tekst til Markdown:
         print(f"FEIL: En feil oppstod under kommunikasjon med Azure OpenAI API: {e}")
         return None
 
-def convert_text_to_markdown_gemini(text_content, model_name="gemini-1.5-flash-latest"):
-    """Konverterer gitt tekst til Markdown ved hjelp av Gemini API."""
+def convert_text_to_markdown_gemini(text_content, model_name="gemini-1.5-flash-latest", use_cache=True):
+    """Konverterer gitt tekst til Markdown ved hjelp av Gemini API.
+
+    Med use_cache gjenbrukes et tidligere svar for nøyaktig samme prompt og modell.
+    """
     print(f"Konverterer tekst til Markdown med Gemini (modell: {model_name})...")
     
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -115,28 +187,14 @@ def convert_text_to_markdown_gemini(text_content, model_name="gemini-1.5-flash-l
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel(model_name)
 
-        # Detaljert prompt basert på vår tidligere samtale
-        prompt = f"""
-Du er en ekspert på å konvertere tekstinnhold, ofte fra OCR (Optical Character Recognition), til perfekt Markdown.
-Din oppgave er å ta følgende tekst og formatere den som Markdown, og følge disse reglene nøye:
+        prompt = build_markdown_prompt(text_content)
+        cache_path = _response_cache_path("gemini", model_name, prompt)
+        if use_cache:
+            cached_output = _read_cached_markdown(cache_path)
+            if cached_output:
+                print(f"Bruker mellomlagret Markdown fra {cache_path}.")
+                return cached_output
 
-1.  **Nøyaktighet:** Behold all tekst nøyaktig slik den er. Ikke endre, legg til eller fjern ord med mindre det er for å korrigere åpenbare OCR-feil som er tydelig ulogiske (men vær forsiktig med dette).
-2.  **Struktur:** Identifiser overskrifter (H1, H2, etc.), lister (nummererte og punktmerkede), fet tekst, kursiv tekst, og bruk passende Markdown-syntaks.
-3.  **Linjeskift:**
-    *   For linjeskift innad i det som ser ut som et sammenhengende avsnitt, spesielt etter korte linjer som i adresser eller metadata-blokker, bruk to mellomrom på slutten av linjen for å tvinge frem et linjeskift (`  \\n`).
-    *   Bruk standard Markdown-avsnitt (en tom linje mellom avsnitt) for større tekstblokker.
-4.  **Horisontale linjer:** For horisontale linjer (`---` eller `***`), sørg for at det er en tom linje *før* dem for å unngå at linjen over blir tolket som en H2-overskrift.
-5.  **Kodeblokker/Sitater:** Hvis du ser noe som ligner på kode eller lengre sitater, bruk passende Markdown (f.eks. ``` for kode, > for sitater).
-6.  **Tabeller:** Hvis det er tabulære data, prøv å formatere dem som Markdown-tabeller hvis mulig. Dette kan være vanskelig med ren tekst fra OCR.
-7.  **Spesialtegn:** Behandle spesialtegn korrekt (f.eks. escape dem om nødvendig, men behold dem som de er hvis de er en del av innholdet).
-8.  **Sideindikatorer:** Hvis du ser klare sideindikatorer som "Side X" eller lignende, kan du vurdere å lage en `---` (horisontal linje) før dem for å skille sider, men inkluder selve sideindikatoren i Markdown-outputen.
-
-Vennligst konverter følgende tekst til Markdown:
-
---- START PÅ TEKST ---
-{text_content}
---- SLUTT PÅ TEKST ---
-"""
         # Sikkerhetsinnstillinger kan justeres ved behov
         # Se: https://ai.google.dev/docs/safety_setting_gemini
         safety_settings = [
@@ -185,7 +243,9 @@ Vennligst konverter følgende tekst til Markdown:
             except Exception:
                 pass # Hvis responsen ikke kan printes direkte
             return None
-            
+
+        if use_cache:
+            _write_cached_markdown(cache_path, markdown_output)
         print("Markdown-konvertering fullført.")
         return markdown_output
 
@@ -193,18 +253,53 @@ Vennligst konverter følgende tekst til Markdown:
         print(f"FEIL: En feil oppstod under kommunikasjon med Gemini API: {e}")
         return None
 
-def convert_text_to_markdown(text_content, model_name="gemini-1.5-flash-latest"):
+def convert_text_to_markdown(text_content, model_name="gemini-1.5-flash-latest", use_cache=True):
     """Konverterer tekst til Markdown ved å bruke den konfigurerte AI-provideren."""
     provider = get_ai_provider()
 
     if provider == "azure_openai":
-        return convert_text_to_markdown_azure_openai(text_content)
+        return convert_text_to_markdown_azure_openai(text_content, use_cache=use_cache)
     elif provider == "gemini":
-        return convert_text_to_markdown_gemini(text_content, model_name)
+        return convert_text_to_markdown_gemini(text_content, model_name, use_cache=use_cache)
     else:
         print(f"FEIL: Ukjent AI-provider '{provider}'. Bruk 'gemini' eller 'azure_openai'.")
         return None
 
+def convert_pdf(pdf_filepath, model_name="gemini-1.5-flash-latest", use_cache=True, pdf_text=None):
+    """Trekker ut tekst fra én PDF og konverterer den til Markdown. Returnerer None ved feil.
+
+    Er pdf_text gitt, brukes den i stedet for å trekke ut teksten på nytt.
+    """
+    if pdf_text is None:
+        pdf_text = extract_text_from_pdf(pdf_filepath)
+    if not pdf_text:
+        print(f"Konvertering av '{pdf_filepath}' avbrutt på grunn av feil under tekstuthenting.")
+        return None
+    return convert_text_to_markdown(pdf_text, model_name=model_name, use_cache=use_cache)
+
+def write_markdown(pdf_filepath, markdown_result, output_filepath=None, to_stdout=False):
+    """Skriver Markdown-resultatet til fil (standard: '<pdf_filnavn_uten_ending>.md') eller til stdout."""
+    if to_stdout:
+        print("\n--- MARKDOWN RESULTAT (STDOUT) ---")
+        print(markdown_result)
+        print("--- SLUTT PÅ MARKDOWN ---")
+        return
+
+    if not output_filepath:
+        # Lag standard output filnavn hvis -o ikke er gitt
+        pdf_path_obj = pathlib.Path(pdf_filepath)
+        # pdf_path_obj.with_suffix('.md') erstatter .pdf med .md
+        output_filepath = pdf_path_obj.with_suffix('.md')
+
+    try:
+        with open(output_filepath, 'w', encoding='utf-8') as f:
+            f.write(markdown_result)
+        print(f"Markdown lagret til: {output_filepath}")
+    except IOError as e:
+        print(f"FEIL: Kunne ikke skrive til filen {output_filepath}. Feil: {e}")
+        print("\nMarkdown-resultat (prøver å printe til konsoll):\n")
+        print(markdown_result)
+
 def main():
     # Load .env from script directory first, then current directory
     script_dir_env = pathlib.Path(__file__).parent / ".env"
@@ -217,11 +312,11 @@ def main():
     else:
         load_dotenv()  # Fallback to default behavior
 
-    parser = argparse.ArgumentParser(description="Konverterer en PDF-fil til Markdown ved hjelp av konfigurert AI-provider.")
-    parser.add_argument("pdf_filepath", help="Stien til PDF-filen som skal konverteres.")
+    parser = argparse.ArgumentParser(description="Konverterer en eller flere PDF-filer til Markdown ved hjelp av konfigurert AI-provider.")
+    parser.add_argument("pdf_filepath", nargs="+", help="Stien til PDF-filen(e) som skal konverteres.")
     parser.add_argument(
         "-o", "--output", 
-        help="Valgfri: Sti til output Markdown-fil. "
+        help="Valgfri: Sti til output Markdown-fil (kun ved én PDF-fil). "
              "Hvis ikke gitt, lagres output som '<pdf_filnavn_uten_ending>.md' i samme mappe som PDF-en."
     )
     parser.add_argument(
@@ -234,36 +329,48 @@ def main():
         action="store_true", # Lager en boolean flagg
         help="Valgfri: Hvis satt, printes output til konsollen (stdout) istedenfor å lagre til fil. Overstyrer -o og standard filnavn."
     )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        help="Valgfri: Maks antall PDF-filer som konverteres samtidig når flere filer er gitt. Standard: 8"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Valgfri: Ikke bruk eller oppdater cachen med tidligere AI-svar (~/.cache/nve_smartdok eller NVE_SMARTDOK_CACHE_DIR)."
+    )
 
     args = parser.parse_args()
 
-    pdf_text = extract_text_from_pdf(args.pdf_filepath)
+    pdf_filepaths = args.pdf_filepath
+    if args.output and len(pdf_filepaths) > 1:
+        parser.error("-o/--output kan bare brukes med én PDF-fil.")
+    if args.max_concurrent < 1:
+        parser.error("--max-concurrent må være minst 1.")
 
-    if pdf_text:
-        markdown_result = convert_text_to_markdown(pdf_text, model_name=args.model)
+    if len(pdf_filepaths) == 1:
+        markdown_result = convert_pdf(pdf_filepaths[0], model_name=args.model, use_cache=not args.no_cache)
         if markdown_result:
-            if args.stdout:
-                print("\n--- MARKDOWN RESULTAT (STDOUT) ---")
-                print(markdown_result)
-                print("--- SLUTT PÅ MARKDOWN ---")
-            else:
-                output_filepath = args.output
-                if not output_filepath:
-                    # Lag standard output filnavn hvis -o ikke er gitt
-                    pdf_path_obj = pathlib.Path(args.pdf_filepath)
-                    # pdf_path_obj.with_suffix('.md') erstatter .pdf med .md
-                    output_filepath = pdf_path_obj.with_suffix('.md')
-                
-                try:
-                    with open(output_filepath, 'w', encoding='utf-8') as f:
-                        f.write(markdown_result)
-                    print(f"Markdown lagret til: {output_filepath}")
-                except IOError as e:
-                    print(f"FEIL: Kunne ikke skrive til filen {output_filepath}. Feil: {e}")
-                    print("\nMarkdown-resultat (prøver å printe til konsoll):\n")
-                    print(markdown_result)
-    else:
-        print("Konvertering avbrutt på grunn av feil under tekstuthenting.")
+            write_markdown(pdf_filepaths[0], markdown_result, output_filepath=args.output, to_stdout=args.stdout)
+        return
+
+    # Tekstuthentingen kjøres først, én fil om gangen i hovedtråden: den kan selv
+    # starte en prosesspool, og å forke fra en prosess med flere tråder kan gi
+    # vranglås (og én pool per tråd ville gitt max_concurrent × cpu_count prosesser).
+    pdf_texts = [extract_text_from_pdf(path) or "" for path in pdf_filepaths]
+    # Deretter venter konverteringen mest på AI-API-et, så bare den kjøres i
+    # parallelle tråder. map gir resultatene i samme rekkefølge som filene ble gitt,
+    # og hver fil skrives så snart den er klar, så ferdige filer ikke går tapt
+    # hvis en senere fil feiler eller kjøringen avbrytes.
+    with ThreadPoolExecutor(max_workers=min(args.max_concurrent, len(pdf_filepaths))) as executor:
+        markdown_results = executor.map(
+            lambda path, text: convert_pdf(path, model_name=args.model, use_cache=not args.no_cache, pdf_text=text),
+            pdf_filepaths, pdf_texts,
+        )
+        for pdf_filepath, markdown_result in zip(pdf_filepaths, markdown_results):
+            if markdown_result:
+                write_markdown(pdf_filepath, markdown_result, output_filepath=args.output, to_stdout=args.stdout)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,12 +1,59 @@
 #!/usr/bin/env python3
 import argparse
+import io
+import json
 import pathlib
 import os
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from openai import AzureOpenAI
 from dotenv import load_dotenv # <-- Ny import
 
+# Lange dokumenter deles ved avsnittsgrenser i biter på omtrent så mange tegn (~8k tokens)
+MAX_CHUNK_CHARS = 24000
+# Maks antall samtidige Gemini-kall når et dokument er delt i biter
+MAX_CONCURRENT_CHUNKS = 8
+# Antall forsøk når Gemini svarer med rate limit eller er midlertidig utilgjengelig
+GEMINI_MAX_ATTEMPTS = 5
+
+# Settes inn i prompten når dokumentet er delt i biter
+CHUNK_NOTE = "Teksten er et utdrag av et lengre dokument. Tagg bare entiteter som står i dette utdraget, og ikke legg til tekst eller tags fra andre deler av dokumentet.\n"
+
+AZURE_PROMPT_TEMPLATE = """
+Du er en ekspert i å identifisere viktige entiteter som elv, innsjø, kraftverk, dam, vannvei i markdown dokumenter.
+Du skal returnere ALL tekst du mottar, men tagg alle entiteter med <elv navn="Storelva"> eller <kraftverk navn="Stordalen kraftverk">.
+
+VIKTIG - Korrekte navn i tags:
+- Bruk KUN egennavnet i 'navn' attributtet, IKKE entitetstypen
+- RIKTIG: <dam navn="Hunderfossen"> (ikke "dam Hunderfossen")
+- RIKTIG: <kraftverk navn="Luster kraftverk">
+- RIKTIG: <elv navn="Fortunselva"> (ikke "elva Fortunselva")
+- FEIL: <dam navn="dam Hunderfossen">, <elv navn="elva Storelva">
+
+Eksempler:
+- "Hunderfossen dam" → <dam navn="Hunderfossen"> dam
+- "dam Hunderfossen" → dam <dam navn="Hunderfossen">
+- "Luster kraftverk" → <kraftverk navn="Luster kraftverk">
+- "kraftverket Luster" → kraftverket <kraftverk navn="Luster kraftverk">
+
+Presiseringer:
+- Vannvei er en menneskebygd vei for vann (et rør eller en kanal for å lede vann).
+- Du skal bare tagge navngitte elver, innsjøer, kraftverk, dammer og vannveier som omtales i teksten.
+- Innsjø kan bli omtalt som vatn eller magasin.
+- Elv kan også bli omtalt som bekk eller vassdrag.
+- Står det to entiteter etter hverandre skilt med / er det to tags <..>/<...>.
+- Returner KUN den taggede markdown-teksten, uten noen introduksjon, forklaring eller annen tekst rundt. Ikke pakk inn svaret i ```markdown ... ```.
+
+Her er teksten i markdown format som du skal tagge på denne måten:
+--- START OF MARKDOWN CONTENT ---
+{content}
+--- END OF MARKDOWN CONTENT ---
+"""
+
 def get_ai_provider():
     """Henter AI-provider fra miljøvariabler."""
     return os.getenv("AI_PROVIDER", "gemini").lower()
@@ -45,17 +92,16 @@ def get_api_key():
 
     return api_key
 
-def tag_markdown_with_azure_openai(markdown_content: str) -> str:
-    """
-    Bruker Azure OpenAI API til å tagge Markdown-innhold.
-
-    Args:
-        markdown_content: Innholdet i Markdown-filen som en streng.
+def strip_markdown_fence(tagged_text: str) -> str:
+    """Fjern eventuelle markdown-kodeblokker rundt svaret fra modellen."""
+    if tagged_text.strip().startswith("```markdown") and tagged_text.strip().endswith("```"):
+        tagged_text = tagged_text.strip()[len("```markdown"):-len("```")].strip()
+    elif tagged_text.strip().startswith("```") and tagged_text.strip().endswith("```"):
+        tagged_text = tagged_text.strip()[len("```"):-len("```")].strip()
+    return tagged_text
 
-    Returns:
-        Den taggede Markdown-strengen.
-    """
-    # Hent konfigurasjonsvariabler
+def get_azure_openai_client() -> tuple[AzureOpenAI, str]:
+    """Lag en Azure OpenAI-klient fra miljøvariabler. Returnerer (klient, deployment)."""
     api_key = os.getenv("AZURE_OPENAI_API_KEY")
     endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
     deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
@@ -65,44 +111,27 @@ def tag_markdown_with_azure_openai(markdown_content: str) -> str:
         print("FEIL: Azure OpenAI-konfigurasjonsvariabler mangler. Sjekk AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT og AZURE_OPENAI_DEPLOYMENT i .env-filen.", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        client = AzureOpenAI(
-            api_key=api_key,
-            azure_endpoint=endpoint,
-            api_version=api_version or "2024-02-01"
-        )
-
-        prompt_template = """
-Du er en ekspert i å identifisere viktige entiteter som elv, innsjø, kraftverk, dam, vannvei i markdown dokumenter.
-Du skal returnere ALL tekst du mottar, men tagg alle entiteter med <elv navn="Storelva"> eller <kraftverk navn="Stordalen kraftverk">.
+    client = AzureOpenAI(
+        api_key=api_key,
+        azure_endpoint=endpoint,
+        api_version=api_version or "2024-02-01"
+    )
+    return client, deployment
 
-VIKTIG - Korrekte navn i tags:
-- Bruk KUN egennavnet i 'navn' attributtet, IKKE entitetstypen
-- RIKTIG: <dam navn="Hunderfossen"> (ikke "dam Hunderfossen")
-- RIKTIG: <kraftverk navn="Luster kraftverk">
-- RIKTIG: <elv navn="Fortunselva"> (ikke "elva Fortunselva")
-- FEIL: <dam navn="dam Hunderfossen">, <elv navn="elva Storelva">
+def tag_markdown_with_azure_openai(markdown_content: str) -> str:
+    """
+    Bruker Azure OpenAI API til å tagge Markdown-innhold.
 
-Eksempler:
-- "Hunderfossen dam" → <dam navn="Hunderfossen"> dam
-- "dam Hunderfossen" → dam <dam navn="Hunderfossen">
-- "Luster kraftverk" → <kraftverk navn="Luster kraftverk">
-- "kraftverket Luster" → kraftverket <kraftverk navn="Luster kraftverk">
+    Args:
+        markdown_content: Innholdet i Markdown-filen som en streng.
 
-Presiseringer:
-- Vannvei er en menneskebygd vei for vann (et rør eller en kanal for å lede vann).
-- Du skal bare tagge navngitte elver, innsjøer, kraftverk, dammer og vannveier som omtales i teksten.
-- Innsjø kan bli omtalt som vatn eller magasin.
-- Elv kan også bli omtalt som bekk eller vassdrag.
-- Står det to entiteter etter hverandre skilt med / er det to tags <..>/<...>.
-- Returner KUN den taggede markdown-teksten, uten noen introduksjon, forklaring eller annen tekst rundt. Ikke pakk inn svaret i ```markdown ... ```.
+    Returns:
+        Den taggede Markdown-strengen.
+    """
+    client, deployment = get_azure_openai_client()
 
-Her er teksten i markdown format som du skal tagge på denne måten:
---- START OF MARKDOWN CONTENT ---
-{content}
---- END OF MARKDOWN CONTENT ---
-"""
-        prompt = prompt_template.format(content=markdown_content)
+    try:
+        prompt = AZURE_PROMPT_TEMPLATE.format(content=markdown_content)
 
         print("Sender innhold til Azure OpenAI for tagging... Dette kan ta et øyeblikk.", file=sys.stderr)
 
@@ -116,18 +145,84 @@ Her er teksten i markdown format som du skal tagge på denne måten:
 
         tagged_text = response.choices[0].message.content
 
-        # Fjern eventuelle markdown-kodeblokker
-        if tagged_text.strip().startswith("```markdown") and tagged_text.strip().endswith("```"):
-            tagged_text = tagged_text.strip()[len("```markdown"):-len("```")].strip()
-        elif tagged_text.strip().startswith("```") and tagged_text.strip().endswith("```"):
-             tagged_text = tagged_text.strip()[len("```"):-len("```")].strip()
-
-        return tagged_text
+        return strip_markdown_fence(tagged_text)
 
     except Exception as e:
         print(f"Feil under kommunikasjon med Azure OpenAI API: {e}", file=sys.stderr)
         sys.exit(1)
 
+def tag_markdown_files_with_azure_openai_batch(markdown_by_path: dict[pathlib.Path, str], poll_interval: float = 60.0) -> dict[pathlib.Path, str]:
+    """
+    Tagger mange Markdown-filer via batch-API-et til Azure OpenAI.
+
+    Alle forespørslene skrives til én JSONL-fil som lastes opp og kjøres som
+    én batch-jobb. Batch-jobber er billigere per token enn vanlige kall, men
+    kan ta opptil 24 timer, så dette egner seg for store mengder filer som
+    ikke haster.
+
+    Args:
+        markdown_by_path: Innholdet i hver Markdown-fil som skal tagges.
+        poll_interval: Sekunder mellom hver statussjekk av batch-jobben.
+
+    Returns:
+        Dictionary fra input-fil til tagget Markdown. Filer som feilet er ikke med.
+    """
+    client, deployment = get_azure_openai_client()
+
+    input_paths = list(markdown_by_path)
+    batch_lines = []
+    for index, input_path in enumerate(input_paths):
+        batch_lines.append(json.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/chat/completions",
+            "body": {
+                "model": deployment,
+                "messages": [
+                    {"role": "user", "content": AZURE_PROMPT_TEMPLATE.format(content=markdown_by_path[input_path])}
+                ],
+                "temperature": 0.1,
+            },
+        }, ensure_ascii=False))
+
+    try:
+        batch_file = io.BytesIO(("\n".join(batch_lines) + "\n").encode("utf-8"))
+        uploaded = client.files.create(file=("batch.jsonl", batch_file), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/chat/completions",
+            completion_window="24h"
+        )
+        print(f"Batch-jobb {batch.id} startet med {len(batch_lines)} filer.", file=sys.stderr)
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+            print(f"Batch-jobb {batch.id}: {batch.status}", file=sys.stderr)
+
+        if batch.status != "completed":
+            print(f"FEIL: Batch-jobb {batch.id} endte med status '{batch.status}'.", file=sys.stderr)
+            sys.exit(1)
+
+        output_text = client.files.content(batch.output_file_id).text if batch.output_file_id else ""
+    except Exception as e:
+        print(f"Feil under kommunikasjon med Azure OpenAI batch-API: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    tagged_by_path: dict[pathlib.Path, str] = {}
+    for line in output_text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        input_path = input_paths[int(item["custom_id"])]
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            print(f"Feil: Tagging av '{input_path}' feilet: {item.get('error') or response.get('body')}", file=sys.stderr)
+            continue
+        tagged_by_path[input_path] = strip_markdown_fence(response["body"]["choices"][0]["message"]["content"])
+
+    return tagged_by_path
+
 def tag_markdown_with_gemini(markdown_content: str, api_key: str) -> str:
     """
     Bruker Gemini API til å tagge Markdown-innhold.
@@ -168,77 +263,287 @@ Presiseringer:
 - Står det to entiteter etter hverandre skilt med / er det to tags <..>/<...>.
 - Returner KUN den taggede markdown-teksten, uten noen introduksjon, forklaring eller annen tekst rundt. Ikke pakk inn svaret i ```markdown ... ```.
 
-Her er teksten i markdown format som du skal tagge på denne måten:
+{chunk_note}Her er teksten i markdown format som du skal tagge på denne måten:
 --- START OF MARKDOWN CONTENT ---
 {content}
 --- END OF MARKDOWN CONTENT ---
 """
-    prompt = prompt_template.format(content=markdown_content)
+    chunks = split_markdown_into_chunks(markdown_content)
+    if len(chunks) == 1:
+        print("Sender innhold til Gemini for tagging... Dette kan ta et øyeblikk.", file=sys.stderr)
+        try:
+            return _generate_tagged_text(model, prompt_template.format(content=markdown_content, chunk_note=""))
+        except _GeminiTaggingError:
+            sys.exit(1)
 
-    print("Sender innhold til Gemini for tagging... Dette kan ta et øyeblikk.", file=sys.stderr)
-    try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1
+    # Bitene tagges uavhengig av hverandre; kallene venter mest på nettverket,
+    # så de kjøres i parallelle tråder og settes sammen i opprinnelig rekkefølge
+    print(f"Sender innhold til Gemini for tagging i {len(chunks)} deler... Dette kan ta et øyeblikk.", file=sys.stderr)
+    prompts = [prompt_template.format(content=chunk, chunk_note=CHUNK_NOTE) for chunk in chunks]
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CHUNKS, len(prompts)))
+    futures = [executor.submit(_generate_tagged_text, model, prompt, cancelled) for prompt in prompts]
+    done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+    if any(future.exception() is not None for future in done):
+        # Én feilet bit gjør hele kjøringen mislykket: bitene som ikke er startet
+        # avbrytes og de som venter på nytt forsøk gir opp, så de ikke bruker tokens
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        sys.exit(1)
+    executor.shutdown()
+    return "\n\n".join(future.result() for future in futures)
+
+
+def split_markdown_into_chunks(markdown_content: str, max_chars: int = MAX_CHUNK_CHARS) -> list[str]:
+    """
+    Del Markdown i biter på høyst max_chars tegn ved avsnittsgrenser (tom linje).
+
+    Et enkelt avsnitt som er lengre enn max_chars blir en egen bit. Bitene
+    satt sammen med "\n\n" gir den opprinnelige teksten.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for paragraph in markdown_content.split("\n\n"):
+        added_len = len(paragraph) + (2 if current else 0)
+        if current and current_len + added_len > max_chars:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_len = 0
+            added_len = len(paragraph)
+        current.append(paragraph)
+        current_len += added_len
+    chunks.append("\n\n".join(current))
+    return chunks
+
+
+class _GeminiTaggingError(Exception):
+    """Gemini-kallet feilet; årsaken er allerede skrevet til stderr."""
+
+
+def _generate_tagged_text(model, prompt: str, cancelled: threading.Event | None = None) -> str:
+    """
+    Send én prompt til Gemini og returner tagget tekst. Prøver igjen med økende ventetid ved rate limit.
+
+    Kaster _GeminiTaggingError ved feil i stedet for å avslutte, siden funksjonen kjøres i trådpoolen.
+    Settes cancelled, gis det opp i stedet for å vente på neste forsøk.
+    """
+    response = None
+    for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.1
+                )
             )
-        )
-        tagged_text = response.text
-        if tagged_text.strip().startswith("```markdown") and tagged_text.strip().endswith("```"):
-            tagged_text = tagged_text.strip()[len("```markdown"):-len("```")].strip()
-        elif tagged_text.strip().startswith("```") and tagged_text.strip().endswith("```"):
-             tagged_text = tagged_text.strip()[len("```"):-len("```")].strip()
-        return tagged_text
-    except Exception as e:
-        print(f"Feil under kommunikasjon med Gemini API: {e}", file=sys.stderr)
-        # Prøv å få mer detaljer fra responsen hvis mulig
-        if 'response' in locals() and hasattr(response, 'prompt_feedback'):
-            print(f"Prompt feedback: {response.prompt_feedback}", file=sys.stderr)
-        if 'response' in locals() and hasattr(response, 'candidates') and response.candidates:
-             for candidate in response.candidates:
-                if candidate.finish_reason != genai.types.Candidate.FinishReason.STOP:
-                    print(f"Kandidat avsluttet med årsak: {candidate.finish_reason.name}", file=sys.stderr)
-                    if hasattr(candidate, 'safety_ratings'):
-                         print(f"Sikkerhetsvurderinger: {candidate.safety_ratings}", file=sys.stderr)
+            return strip_markdown_fence(response.text)
+        except (google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable) as e:
+            if attempt == GEMINI_MAX_ATTEMPTS:
+                print(f"Feil under kommunikasjon med Gemini API: {e}", file=sys.stderr)
+                raise _GeminiTaggingError(str(e)) from e
+            wait_seconds = 2 ** attempt
+            print(f"Gemini API er overbelastet ({e}). Prøver igjen om {wait_seconds} sekunder...", file=sys.stderr)
+            if cancelled is None:
+                time.sleep(wait_seconds)
+            elif cancelled.wait(wait_seconds):
+                raise _GeminiTaggingError("avbrutt fordi en annen del feilet") from e
+        except Exception as e:
+            print(f"Feil under kommunikasjon med Gemini API: {e}", file=sys.stderr)
+            # Prøv å få mer detaljer fra responsen hvis mulig
+            if response is not None and hasattr(response, 'prompt_feedback'):
+                print(f"Prompt feedback: {response.prompt_feedback}", file=sys.stderr)
+            if response is not None and hasattr(response, 'candidates') and response.candidates:
+                 for candidate in response.candidates:
+                    if candidate.finish_reason != genai.types.Candidate.FinishReason.STOP:
+                        print(f"Kandidat avsluttet med årsak: {candidate.finish_reason.name}", file=sys.stderr)
+                        if hasattr(candidate, 'safety_ratings'):
+                             print(f"Sikkerhetsvurderinger: {candidate.safety_ratings}", file=sys.stderr)
+            raise _GeminiTaggingError(str(e)) from e
+
+
+def run_batch(input_path: pathlib.Path) -> None:
+    """Tagger én fil eller alle .md-filer i en mappe som én batch-jobb og skriver .sd-filer ved siden av."""
+    if input_path.is_dir():
+        input_paths = sorted(input_path.glob("*.md"))
+    elif input_path.is_file():
+        input_paths = [input_path]
+    else:
+        print(f"Feil: Input '{input_path}' ble ikke funnet.", file=sys.stderr)
+        sys.exit(1)
+
+    markdown_by_path: dict[pathlib.Path, str] = {}
+    for md_path in input_paths:
+        try:
+            markdown_content = md_path.read_text(encoding="utf-8")
+        except Exception as e:
+            print(f"Feil under lesing av filen '{md_path}': {e}", file=sys.stderr)
+            continue
+        if markdown_content.strip():
+            markdown_by_path[md_path] = markdown_content
+        else:
+            # Tomme filer gir tom output, som ved tagging av én fil
+            output_path = md_path.with_suffix(".sd")
+            try:
+                output_path.write_text("", encoding="utf-8")
+                print(f"Tom output skrevet til '{output_path}'", file=sys.stderr)
+            except Exception as e:
+                print(f"Feil under skriving til output-filen '{output_path}': {e}", file=sys.stderr)
+
+    if not markdown_by_path:
+        print("Ingen Markdown-filer med innhold å tagge.", file=sys.stderr)
+        return
+
+    tagged_by_path = tag_markdown_files_with_azure_openai_batch(markdown_by_path)
+    for md_path, tagged_content in tagged_by_path.items():
+        output_path = md_path.with_suffix(".sd")
+        try:
+            output_path.write_text(tagged_content, encoding="utf-8")
+            print(f"Tagget innhold lagret til: {output_path}", file=sys.stderr)
+        except Exception as e:
+            print(f"Feil under skriving til output-filen '{output_path}': {e}", file=sys.stderr)
+
+    if len(tagged_by_path) < len(markdown_by_path):
+        print(f"Feil: {len(markdown_by_path) - len(tagged_by_path)} av {len(markdown_by_path)} filer ble ikke tagget.", file=sys.stderr)
         sys.exit(1)
 
+def get_tagger():
+    """
+    Velg taggefunksjon for konfigurert AI-provider. Avslutter ved ukjent provider.
+
+    For Gemini hentes API-nøkkelen her (kan spørre brukeren), så det skjer én
+    gang i hovedtråden også når flere filer tagges samtidig.
+    """
+    provider = get_ai_provider()
+
+    if provider == "azure_openai":
+        return tag_markdown_with_azure_openai
+    elif provider == "gemini":
+        api_key = get_api_key()
+        if not api_key:
+            print("API-nøkkel er påkrevd for å fortsette.", file=sys.stderr)
+            sys.exit(1)
+        return lambda markdown_content: tag_markdown_with_gemini(markdown_content, api_key)
+    else:
+        print(f"FEIL: Ukjent AI-provider '{provider}'. Bruk 'gemini' eller 'azure_openai'.", file=sys.stderr)
+        sys.exit(1)
+
+def read_markdown_file(input_path: pathlib.Path) -> str | None:
+    """Les en Markdown-fil. Skriver feilmelding og returnerer None hvis den ikke kan leses."""
+    if not input_path.is_file():
+        print(f"Feil: Input-filen '{input_path}' ble ikke funnet.", file=sys.stderr)
+        return None
+
+    if input_path.suffix.lower() != ".md":
+        print(f"Advarsel: Input-filen '{input_path}' har ikke .md-ending.", file=sys.stderr)
+
+    try:
+        return input_path.read_text(encoding="utf-8")
+    except Exception as e:
+        print(f"Feil under lesing av filen '{input_path}': {e}", file=sys.stderr)
+        return None
+
+def write_tagged_output(input_path: pathlib.Path, tagged_content: str, output_path: pathlib.Path | None = None) -> bool:
+    """Skriv tagget innhold til output_path (standard: input-filen med .sd-ending). Returnerer False ved feil."""
+    output_path = output_path if output_path else input_path.with_suffix(".sd")
+    try:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(tagged_content, encoding="utf-8")
+        print(f"Tagget innhold lagret til: {output_path}", file=sys.stderr)
+        return True
+    except Exception as e:
+        print(f"Feil under skriving til output-filen '{output_path}': {e}", file=sys.stderr)
+        return False
+
+def _tag_file(input_path: pathlib.Path, tagger) -> str | None:
+    """Les og tagg én fil i flerfilmodus. Returnerer None ved feil, tom streng for tomme filer."""
+    markdown_content = read_markdown_file(input_path)
+    if markdown_content is None:
+        return None
+    if not markdown_content.strip():
+        print(f"Filen '{input_path}' er tom eller inneholder bare mellomrom.", file=sys.stderr)
+        return ""
+    try:
+        return tagger(markdown_content)
+    except SystemExit:
+        # Taggefunksjonene avslutter ved API-feil; med flere filer gjelder feilen bare denne
+        return None
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Tagger en Markdown-fil (.md) ved hjelp av Gemini API og lagrer resultatet som en .sd-fil.",
+        description="Tagger en eller flere Markdown-filer (.md) ved hjelp av konfigurert AI-provider og lagrer resultatet som .sd-filer.",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument(
         "input_file",
         type=pathlib.Path,
-        help="Sti til input Markdown-fil (.md)"
+        nargs="+",
+        help="Sti til input Markdown-fil(er) (.md), eller en mappe med .md-filer sammen med --batch"
     )
     parser.add_argument(
         "-o", "--output",
         type=pathlib.Path,
-        help="Valgfri sti for output .sd-fil. Hvis ikke spesifisert, lages filen ved siden av input-filen med .sd-ending."
+        help="Valgfri sti for output .sd-fil (kun ved én input-fil). Hvis ikke spesifisert, lages filen ved siden av input-filen med .sd-ending."
     )
     parser.add_argument(
         "--stdout",
         action="store_true",
         help="Skriv output til stdout i stedet for en fil."
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Tagg via batch-API-et til Azure OpenAI (billigere, men kan ta opptil 24 timer). Output lagres som .sd ved siden av hver .md-fil."
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        help="Valgfri: Maks antall filer som tagges samtidig når flere filer er gitt. Standard: 8"
+    )
 
     args = parser.parse_args()
 
-    input_path: pathlib.Path = args.input_file
-
-    if not input_path.is_file():
-        print(f"Feil: Input-filen '{input_path}' ble ikke funnet.", file=sys.stderr)
-        sys.exit(1)
+    input_paths: list[pathlib.Path] = args.input_file
+    if args.output and len(input_paths) > 1:
+        parser.error("-o/--output kan bare brukes med én input-fil.")
+    if args.max_concurrent < 1:
+        parser.error("--max-concurrent må være minst 1.")
+
+    if args.batch:
+        if args.output or args.stdout:
+            parser.error("--batch kan ikke kombineres med -o/--output eller --stdout.")
+        if len(input_paths) > 1:
+            parser.error("--batch tar én fil eller én mappe med .md-filer.")
+        if get_ai_provider() != "azure_openai":
+            print("FEIL: --batch støttes bare med AI_PROVIDER=azure_openai.", file=sys.stderr)
+            sys.exit(1)
+        run_batch(input_paths[0])
+        sys.exit(0)
 
-    if input_path.suffix.lower() != ".md":
-        print(f"Advarsel: Input-filen '{input_path}' har ikke .md-ending.", file=sys.stderr)
+    if len(input_paths) > 1:
+        tagger = get_tagger()
+        failed = 0
+        # Taggingen venter mest på AI-API-et, så filene kjøres i parallelle tråder.
+        # map gir resultatene i samme rekkefølge som filene ble gitt, og hver fil
+        # skrives så snart den er klar.
+        with ThreadPoolExecutor(max_workers=min(args.max_concurrent, len(input_paths))) as executor:
+            tagged_results = executor.map(lambda path: _tag_file(path, tagger), input_paths)
+            for input_path, tagged_content in zip(input_paths, tagged_results):
+                if tagged_content is None:
+                    failed += 1
+                elif args.stdout:
+                    print(tagged_content)
+                elif not write_tagged_output(input_path, tagged_content):
+                    failed += 1
+        if failed:
+            print(f"Feil: {failed} av {len(input_paths)} filer ble ikke tagget.", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
 
-    try:
-        markdown_content = input_path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Feil under lesing av filen '{input_path}': {e}", file=sys.stderr)
+    input_path = input_paths[0]
+    markdown_content = read_markdown_file(input_path)
+    if markdown_content is None:
         sys.exit(1)
 
     if not markdown_content.strip():
@@ -254,31 +559,12 @@ def main():
                 print(f"Kunne ikke skrive tom output til '{output_path}': {e}", file=sys.stderr)
         sys.exit(0)
 
-    provider = get_ai_provider()
-
-    if provider == "azure_openai":
-        tagged_content = tag_markdown_with_azure_openai(markdown_content)
-    elif provider == "gemini":
-        api_key = get_api_key()
-        if not api_key:
-            print("API-nøkkel er påkrevd for å fortsette.", file=sys.stderr)
-            sys.exit(1)
-        tagged_content = tag_markdown_with_gemini(markdown_content, api_key)
-    else:
-        print(f"FEIL: Ukjent AI-provider '{provider}'. Bruk 'gemini' eller 'azure_openai'.", file=sys.stderr)
-        sys.exit(1)
+    tagged_content = get_tagger()(markdown_content)
 
     if args.stdout:
         print(tagged_content)
-    else:
-        output_path = args.output if args.output else input_path.with_suffix(".sd")
-        try:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(tagged_content, encoding="utf-8")
-            print(f"Tagget innhold lagret til: {output_path}", file=sys.stderr)
-        except Exception as e:
-            print(f"Feil under skriving til output-filen '{output_path}': {e}", file=sys.stderr)
-            sys.exit(1)
+    elif not write_tagged_output(input_path, tagged_content, args.output):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file